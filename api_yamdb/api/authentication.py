@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import USER_CLAIMS, VERSION_CLAIM
+
+User = get_user_model()
+
+# Поля, которые нужны правам доступа и сериализаторам. Пароль и даты
+# входа не кэшируются и остаются отложенными.
+CACHED_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'bio', 'role',
+    'is_staff', 'is_superuser', 'is_active', 'token_version',
+)
+
+
+def user_key(user_id):
+    return f'user:{user_id}'
+
+
+def token_version_key(user_id):
+    return f'token-version:{user_id}'
+
+
+def cache_user(user):
+    """Кэширует пользователя и текущую версию его токенов."""
+    cache.set_many(
+        {
+            user_key(user.pk): {
+                name: getattr(user, name) for name in CACHED_FIELDS
+            },
+            token_version_key(user.pk): user.token_version,
+        },
+        settings.USER_CACHE_TIMEOUT
+    )
+
+
+def restore_user(values):
+    """
+    Пользователь из закэшированных полей, как загруженный из БД.
+
+    Отсутствующие поля остаются отложенными: Django дочитает их из БД
+    при первом обращении.
+    """
+    names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in values
+    ]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, names, [values[name] for name in names]
+    )
+
+
+def complete_user(user):
+    """
+    Дочитывает одним запросом кэшируемые поля, которых нет у user.
+
+    Пользователь, собранный из утверждений токена, знает только их;
+    без этого каждое отложенное поле читалось бы отдельным SELECT.
+    Дочитанный пользователь кэшируется для следующих запросов.
+    """
+    missing = user.get_deferred_fields() & set(CACHED_FIELDS)
+    if missing:
+        user.refresh_from_db(fields=missing)
+        cache_user(user)
+    return user
+
+
+def forget_user(user_id):
+    cache.delete_many((user_key(user_id), token_version_key(user_id)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без SELECT пользователя на каждый запрос.
+
+    Токен принимается, только если его версия совпадает с версией
+    токенов пользователя: смена роли или статуса повышает версию и
+    сразу отзывает выданные токены. Версии хранятся в кэше, пользователь
+    берётся из кэша, а при его отсутствии - из утверждений токена;
+    в базу данных аутентификация обращается только при промахе кэша
+    версий. Отзыв сразу виден всем процессам, только если кэш общий
+    (см. проверку api.E001).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        cached = cache.get_many(
+            (user_key(user_id), token_version_key(user_id))
+        )
+        version = cached.get(token_version_key(user_id))
+        user = (
+            restore_user(cached[user_key(user_id)])
+            if user_key(user_id) in cached else None
+        )
+        has_claims = all(claim in validated_token for claim in USER_CLAIMS)
+        if version is None or (user is None and not has_claims):
+            user = super().get_user(validated_token)
+            cache_user(user)
+            version = user.token_version
+        if validated_token.get(VERSION_CLAIM, 0) != version:
+            raise AuthenticationFailed(
+                _('Token has been revoked'), code='token_revoked'
+            )
+        if user is None:
+            user = restore_user({
+                'id': user_id,
+                **{claim: validated_token[claim] for claim in USER_CLAIMS},
+                'token_version': version,
+            })
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        return user
@@ -0,0 +1,167 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from reviews.management.commands.load_csv import batched
+from reviews.models import Review, Title, User
+from reviews.search import title_search
+
+from .cache import bump_on_commit
+from .pagination import count_namespace
+from .serializers import ReviewImportSerializer
+
+
+def iter_items(data):
+    """Объекты из тела массовой загрузки: JSON-массива или NDJSON."""
+    if isinstance(data, (dict, str)) or not hasattr(data, '__iter__'):
+        raise ValidationError(
+            {'non_field_errors': ['Ожидается список объектов.']}
+        )
+    return iter(data)
+
+
+def check_size(size):
+    if size > settings.BULK_MAX_ITEMS:
+        raise ValidationError({'non_field_errors': [
+            f'За один запрос можно загрузить не больше '
+            f'{settings.BULK_MAX_ITEMS} объектов.'
+        ]})
+
+
+def bulk_items(data):
+    """Список объектов из тела массовой загрузки."""
+    items = list(islice(iter_items(data), settings.BULK_MAX_ITEMS + 1))
+    check_size(len(items))
+    return items
+
+
+def validate_items(serializer_class, items, context, start=0):
+    """
+    Проверяет объекты сериализатором по отдельности.
+
+    Возвращает пары (номер, проверенные данные) и результаты по
+    номерам для объектов с ошибками. Нумерация начинается со start.
+    """
+    valid = []
+    results = {}
+    for index, item in enumerate(items, start):
+        serializer = serializer_class(data=item, context=context)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'errors': serializer.errors}
+    return valid, results
+
+
+def create_titles(valid):
+    """
+    Записывает проверенные произведения и их жанры в одной транзакции.
+
+    bulk_create не отправляет сигналы, поэтому поисковый индекс и
+    счётчики пагинации обновляются здесь. SQLite в Django 3.2 не
+    возвращает id из bulk_create, и без них не записать связи с
+    жанрами: там произведения сохраняются по одному.
+    """
+    titles = [
+        Title(
+            name=data['name'],
+            year=data['year'],
+            description=data.get('description', ''),
+            category=data['category'],
+        )
+        for _, data in valid
+    ]
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            Title.objects.bulk_create(
+                titles, batch_size=settings.BULK_BATCH_SIZE
+            )
+            title_search().index(titles)
+        else:
+            for title in titles:
+                title.save()
+        Title.genre.through.objects.bulk_create(
+            (
+                Title.genre.through(title_id=title.pk, genre_id=genre_id)
+                for title, (_, data) in zip(titles, valid)
+                for genre_id in {genre.pk for genre in data['genre']}
+            ),
+            batch_size=settings.BULK_BATCH_SIZE
+        )
+    bump_on_commit(count_namespace(Title))
+    return titles
+
+
+def import_reviews(items, context):
+    """
+    Загружает отзывы из потока пачками по BULK_BATCH_SIZE.
+
+    Для каждой пачки произведения, авторы и уже существующие отзывы
+    находятся тремя запросами по множествам, без запроса на каждый
+    отзыв. Повторы внутри потока отсекаются тем же правилом, что и
+    ограничение unique_author_title. Рейтинги затронутых произведений
+    пересчитываются один раз в конце. Всё выполняется в одной
+    транзакции. Возвращает результаты по номерам объектов и число
+    созданных отзывов.
+    """
+    results = []
+    pairs = set()
+    title_ids = set()
+    created = 0
+    with transaction.atomic():
+        for batch in batched(iter_items(items), settings.BULK_BATCH_SIZE):
+            start = len(results)
+            check_size(start + len(batch))
+            valid, batch_results = validate_items(
+                ReviewImportSerializer, batch, context, start
+            )
+            users = dict(User.objects.filter(
+                username__in={data['author'] for _, data in valid}
+            ).values_list('username', 'pk'))
+            titles = set(Title.objects.filter(
+                pk__in={data['title'] for _, data in valid}
+            ).order_by().values_list('pk', flat=True))
+            pairs.update(Review.objects.filter(
+                title_id__in=titles, author_id__in=users.values()
+            ).values_list('title_id', 'author_id'))
+            reviews = []
+            for index, data in valid:
+                pair = (data['title'], users.get(data['author']))
+                if data['title'] not in titles:
+                    errors = {'title': ['Произведение не найдено.']}
+                elif pair[1] is None:
+                    errors = {'author': ['Пользователь не найден.']}
+                elif pair in pairs:
+                    errors = {'non_field_errors': ['Отзыв уже существует!']}
+                else:
+                    pairs.add(pair)
+                    reviews.append((index, Review(
+                        title_id=pair[0],
+                        author_id=pair[1],
+                        text=data['text'],
+                        score=data['score'],
+                    )))
+                    continue
+                batch_results[index] = {'index': index, 'errors': errors}
+            Review.objects.bulk_create([review for _, review in reviews])
+            for index, review in reviews:
+                batch_results[index] = {'index': index}
+                # id известен, если СУБД возвращает его из bulk_create.
+                if review.pk is not None:
+                    batch_results[index]['id'] = review.pk
+                title_ids.add(review.title_id)
+            created += len(reviews)
+            results.extend(
+                batch_results[index]
+                for index in range(start, start + len(batch))
+            )
+        # bulk_create не отправляет сигналы: рейтинги и кэш
+        # произведений обновляются один раз на произведение.
+        Title.objects.filter(pk__in=title_ids).rebuild_ratings()
+    bump_on_commit(
+        *(f'title:{title_id}' for title_id in title_ids),
+        count_namespace(Review)
+    )
+    return results, created
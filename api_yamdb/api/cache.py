@@ -0,0 +1,205 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def version_key(namespace):
+    return f'version:{namespace}'
+
+
+def get_version(namespace):
+    """
+    Текущая версия пространства имён кэша.
+
+    Начальная версия берётся от времени, чтобы после вытеснения ключа
+    версия не вернулась к значению, под которым лежат устаревшие записи.
+    """
+    key = version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key, 0)
+    return version
+
+
+def bump_version(namespace):
+    """Делает недействительными все записи пространства имён."""
+    try:
+        cache.incr(version_key(namespace))
+    except ValueError:
+        cache.set(version_key(namespace), time.time_ns(), None)
+
+
+def bump_on_commit(*namespaces, using=None):
+    """
+    Повышает версии пространств имён после фиксации транзакции.
+
+    До фиксации другой процесс ещё читает старые строки и закэшировал
+    бы их под новой версией. Вне транзакции версии повышаются сразу.
+    """
+    def bump():
+        for namespace in namespaces:
+            bump_version(namespace)
+
+    transaction.on_commit(bump, using=using)
+
+
+def request_key(prefix, namespace, request):
+    """Ключ кэша для запроса с учётом версии пространства имён."""
+    url = hashlib.md5(
+        request.build_absolute_uri().encode()
+    ).hexdigest()
+    return f'{prefix}:{namespace}:{get_version(namespace)}:{url}'
+
+
+class CachedListMixin:
+    """Кэширует ответы list с версионной инвалидацией по cache_namespace."""
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        key = request_key('list', self.cache_namespace, request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.CATALOGUE_CACHE_TIMEOUT)
+        return response
+
+
+def tag_versions(tags):
+    """Текущие версии набора тегов одним обращением к кэшу."""
+    keys = {version_key(tag): tag for tag in tags}
+    versions = cache.get_many(keys)
+    missing = set(keys) - set(versions)
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def make_etag(data):
+    return quote_etag(hashlib.md5(
+        json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    ).hexdigest())
+
+
+def etag_response(request, data, etag=None, response=None):
+    """
+    Ответ с заголовком ETag.
+
+    Если клиент прислал совпадающий If-None-Match, возвращается 304
+    без тела.
+    """
+    etag = etag or make_etag(data)
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    elif response is None:
+        response = Response(data)
+    response['ETag'] = etag
+    return response
+
+
+class TaggedCache:
+    """
+    Кэш сериализованных объектов с тегами зависимостей.
+
+    Вместе с данными хранятся версии тегов на момент записи. Запись
+    считается устаревшей, если версия хотя бы одного тега изменилась,
+    поэтому для инвалидации достаточно вызвать bump_version(tag).
+    Счётчики попаданий и промахов хранятся в общем кэше и суммируются
+    по всем процессам; их выводит команда cache_stats.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def stats_key(self, name):
+        return f'stats:{self.prefix}:{name}'
+
+    def key(self, pk):
+        return f'{self.prefix}:{pk}'
+
+    def get_many(self, pks):
+        """Действительные записи для первичных ключей pks."""
+        entries = cache.get_many([self.key(pk) for pk in pks])
+        versions = tag_versions({
+            tag for entry in entries.values() for tag in entry['tags']
+        })
+        valid = {
+            pk: entries[self.key(pk)] for pk in pks
+            if self.key(pk) in entries
+            and entries[self.key(pk)]['tags'].items() <= versions.items()
+        }
+        self.count('hits', len(valid))
+        self.count('misses', len(pks) - len(valid))
+        return valid
+
+    def get(self, pk):
+        return self.get_many([pk]).get(pk)
+
+    def set_many(self, items):
+        """Сохраняет пары (pk, данные, теги) и возвращает записи."""
+        versions = tag_versions({
+            tag for _, _, tags in items for tag in tags
+        })
+        entries = {
+            pk: {
+                'data': data,
+                'etag': make_etag(data),
+                'tags': {tag: versions[tag] for tag in tags},
+            }
+            for pk, data, tags in items
+        }
+        cache.set_many(
+            {self.key(pk): entry for pk, entry in entries.items()},
+            settings.CATALOGUE_CACHE_TIMEOUT
+        )
+        return entries
+
+    def set(self, pk, data, tags):
+        return self.set_many(((pk, data, tags),))[pk]
+
+    def count(self, name, delta):
+        if not delta:
+            return
+        key = self.stats_key(name)
+        if not cache.add(key, delta, None):
+            try:
+                cache.incr(key, delta)
+            except ValueError:
+                cache.set(key, delta, None)
+
+    def stats(self):
+        """Счётчики попаданий и промахов всех процессов."""
+        names = ('hits', 'misses')
+        values = cache.get_many([self.stats_key(name) for name in names])
+        return {
+            name: values.get(self.stats_key(name), 0) for name in names
+        }
+
+    def reset_stats(self):
+        cache.delete_many(
+            [self.stats_key(name) for name in ('hits', 'misses')]
+        )
+
+
+title_cache = TaggedCache('title')
+
+
+def title_tags(title):
+    """Теги, от которых зависит представление произведения."""
+    return (
+        f'title:{title.pk}',
+        f'category:{title.category_id}',
+        *(f'genre:{genre.pk}' for genre in title.genre.all()),
+    )
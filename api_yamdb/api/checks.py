@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+# Бэкенды, данные которых не видны другим процессам.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Версии кэша и токенов должны быть общими для всех процессов.
+
+    С кэшем в памяти процесса изменения, сделанные в одном процессе,
+    не видны остальным, а отозванные токены принимаются до истечения
+    USER_CACHE_TIMEOUT.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    message = (
+        f'Кэш по умолчанию ({backend}) не общий для процессов приложения.'
+    )
+    hint = (
+        'Задайте CACHE_BACKEND=django_redis.cache.RedisCache и '
+        'CACHE_LOCATION.'
+    )
+    if settings.DEBUG:
+        return [Warning(message, hint=hint, id='api.W001')]
+    return [Error(message, hint=hint, id='api.E001')]
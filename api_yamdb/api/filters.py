@@ -1,24 +1,71 @@
+from django.db.models import Count
 from django_filters import CharFilter, FilterSet
 
+from api.registry import categories, genres
 from reviews.models import Title
+from reviews.search import title_search
+
+
+def parse_slugs(value):
+    """Множество slug из строки через запятую."""
+    return {slug.strip() for slug in value.split(',') if slug.strip()}
 
 
 class TitleFilter(FilterSet):
-    """Фильтр произведений."""
+    """
+    Фильтр произведений.
+
+    category и genre принимают список slug через запятую и отбирают
+    произведения хотя бы с одним из них, genre_all - со всеми сразу.
+    Поиск по подстроке slug включается отдельными параметрами
+    category_contains и genre_contains.
+    """
 
     name = CharFilter(
         field_name='name',
         lookup_expr='contains',
     )
-    category = CharFilter(
+    category = CharFilter(method='filter_category')
+    genre = CharFilter(method='filter_genre')
+    genre_all = CharFilter(method='filter_genre_all')
+    category_contains = CharFilter(
         field_name='category__slug',
         lookup_expr='icontains',
     )
-    genre = CharFilter(
+    genre_contains = CharFilter(
         field_name='genre__slug',
         lookup_expr='icontains',
+        distinct=True,
     )
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year')
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(
+            category_id__in=categories.ids(parse_slugs(value))
+        )
+
+    def filter_genre(self, queryset, name, value):
+        # Подзапрос по таблице связей не размножает произведения с
+        # несколькими подходящими жанрами, и distinct не нужен.
+        return queryset.filter(pk__in=Title.genre.through.objects.filter(
+            genre_id__in=genres.ids(parse_slugs(value))
+        ).values('title_id'))
+
+    def filter_genre_all(self, queryset, name, value):
+        slugs = parse_slugs(value)
+        genre_ids = genres.ids(slugs)
+        if len(genre_ids) < len(slugs):
+            return queryset.none()
+        return queryset.filter(pk__in=Title.genre.through.objects.filter(
+            genre_id__in=genre_ids
+        ).values('title_id').annotate(
+            genres=Count('genre_id')
+        ).filter(genres=len(genre_ids)).values('title_id'))
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск с сортировкой по релевантности."""
+        return title_search().search(queryset, value)
@@ -0,0 +1,111 @@
+import random
+import statistics
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.views import signup
+from reviews.management.commands.load_csv import closing_connection
+from reviews.models import OutgoingEmail, User
+
+DOMAIN = 'bench.fake'
+
+
+class Command(BaseCommand):
+    help = "Нагрузочный тест регистрации при параллельных запросах"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=200,
+            help=(
+                'Количество разных пользователей: остальные запросы - '
+                'повторные регистрации.'
+            ),
+        )
+        parser.add_argument(
+            '--conflicts',
+            type=float,
+            default=0.1,
+            help='Доля запросов с email, занятым другим пользователем.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Не удалять созданных пользователей и письма.',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Свой префикс у каждого запуска: в конце удаляются только
+        # созданные им пользователи и письма.
+        prefix = f'bench_{uuid.uuid4().hex[:8]}_'
+        payloads = []
+        for _ in range(options['requests']):
+            idx = rng.randrange(options['users'])
+            email_idx = idx
+            if rng.random() < options['conflicts']:
+                email_idx = (idx + 1) % options['users']
+            payloads.append({
+                'username': f'{prefix}{idx}',
+                'email': f'{prefix}{email_idx}@{DOMAIN}',
+            })
+        factory = APIRequestFactory()
+
+        @closing_connection
+        def post(payload):
+            request = factory.post(
+                '/api/v1/auth/signup/', payload, format='json'
+            )
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = signup(request)
+                elapsed = time.perf_counter() - started
+            return response.status_code, elapsed, len(queries)
+
+        # Измеряется сама регистрация, а не ограничение частоты.
+        with override_settings(AUTH_THROTTLE_RATES={}):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                results = list(pool.map(post, payloads))
+            total = time.perf_counter() - started
+        self.report(results, total)
+        if not options['keep']:
+            OutgoingEmail.objects.filter(
+                recipient__startswith=prefix, recipient__endswith=DOMAIN
+            ).delete()
+            User.objects.filter(
+                username__startswith=prefix, email__endswith=DOMAIN
+            ).delete()
+
+    def report(self, results, total):
+        """Выводит скорость, задержки и число запросов к БД по статусам."""
+        timings = sorted(elapsed for _, elapsed, _ in results)
+        self.stdout.write(
+            f"Запросов: {len(results)} за {total:.2f} с, "
+            f"{len(results) / total:.0f} запросов/с."
+        )
+        self.stdout.write(
+            f"p50: {statistics.median(timings) * 1000:.1f} мс, "
+            f"p95: {statistics.quantiles(timings, n=20)[-1] * 1000:.1f} мс."
+        )
+        statuses = Counter(status for status, _, _ in results)
+        for status, count in sorted(statuses.items()):
+            queries = [
+                query_count for code, _, query_count in results
+                if code == status
+            ]
+            self.stdout.write(
+                f"Статус {status}: {count} ответов, "
+                f"{statistics.mean(queries):.1f} запросов к БД в среднем."
+            )
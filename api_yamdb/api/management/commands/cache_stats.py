@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import title_cache
+
+
+class Command(BaseCommand):
+    help = "Попадания и промахи кэша произведений"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить счётчики после вывода.',
+        )
+
+    def handle(self, *args, **options):
+        stats = title_cache.stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0.0
+        self.stdout.write(
+            f"Попаданий: {stats['hits']}, промахов: {stats['misses']}, "
+            f"доля попаданий: {ratio:.1%}."
+        )
+        if options['reset']:
+            title_cache.reset_stats()
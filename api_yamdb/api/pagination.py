@@ -0,0 +1,174 @@
+import hashlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+from .cache import get_version
+
+
+def count_namespace(model):
+    return f'count:{model._meta.model_name}'
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator, который берёт COUNT из кэша.
+
+    Ключ включает SQL запроса, то есть набор фильтров, и версию
+    пространства имён модели, которую сбрасывают сигналы изменения
+    данных. Запись дополнительно ограничена сроком жизни.
+    """
+
+    @cached_property
+    def count(self):
+        try:
+            sql = str(self.object_list.query)
+        except (AttributeError, EmptyResultSet):
+            return super().count
+        namespace = count_namespace(self.object_list.model)
+        key = '{}:{}:{}'.format(
+            namespace,
+            get_version(namespace),
+            hashlib.md5(sql.encode()).hexdigest()
+        )
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class UncountedPage(Page):
+    """Страница, о следующей странице которой известно без COUNT."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class UncountedPaginator(Paginator):
+    """Paginator без COUNT: выбирает на одну запись больше страницы."""
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы не является целым числом.')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1.')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На странице нет результатов.')
+        return UncountedPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page
+        )
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    Навигация по номеру страницы с кэшированным количеством объектов.
+
+    С параметром ?count=false количество не считается вовсе и
+    не попадает в ответ.
+    """
+
+    django_paginator_class = CachedCountPaginator
+    count_query_param = 'count'
+
+    def omit_count(self, request):
+        return request.query_params.get(
+            self.count_query_param, ''
+        ).lower() in ('false', '0')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.counted = not self.omit_count(request)
+        if self.counted:
+            return super().paginate_queryset(queryset, request, view)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        page_number = request.query_params.get(self.page_query_param, 1)
+        try:
+            self.page = UncountedPaginator(queryset, page_size).page(
+                page_number
+            )
+        except (EmptyPage, PageNotAnInteger) as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            ))
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.counted:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class PubDateCursorPagination(CursorPagination):
+    """
+    Навигация по курсору для отзывов и комментариев.
+
+    Порядок совпадает с TextAuthorDateModel.Meta.ordering, id лишь
+    делает его однозначным. Курсор DRF хранит только pub_date первой
+    записи страницы, а записи с той же датой пропускает через OFFSET;
+    такие совпадения редки, так что смещение остаётся малым.
+    """
+
+    ordering = ('-pub_date', '-id')
+
+
+class OptionalCursorPagination(CachedCountPagination):
+    """
+    Постраничная навигация по номеру страницы или, по запросу, по курсору.
+
+    Курсор включается параметром ?pagination=cursor, ссылки next и
+    previous затем несут параметр cursor.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_pagination_class = PubDateCursorPagination
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.use_cursor(request):
+            self.cursor_paginator = None
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is None:
+            return super().get_paginated_response(data)
+        return self.cursor_paginator.get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is None:
+            return super().to_html()
+        return self.cursor_paginator.to_html()
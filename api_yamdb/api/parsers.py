@@ -0,0 +1,32 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Поток JSON-объектов, по одному в строке.
+
+    Возвращает генератор: строки читаются из тела запроса по мере
+    обработки, и большой поток не собирается в памяти целиком.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return self.iter_objects(stream, encoding)
+
+    @staticmethod
+    def iter_objects(stream, encoding):
+        for number, line in enumerate(stream, 1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise ParseError(f'Строка {number}: {error}')
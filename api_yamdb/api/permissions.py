@@ -8,6 +8,15 @@ class IsAdmin(permissions.BasePermission):
         return request.user.is_authenticated and request.user.is_admin()
 
 
+class IsAdminOrModerator(permissions.BasePermission):
+    """Разрешение для модератора или администратора."""
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.is_moderator() or request.user.is_admin()
+        )
+
+
 class IsAdminUserOrReadOnly(IsAdmin):
     """Разрешение только для чтения, либо полный доступ для администратора."""
 
@@ -0,0 +1,107 @@
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection
+
+from reviews.models import Category, Genre
+
+from .cache import get_version
+
+
+class SlugRegistry:
+    """
+    Копия таблицы категорий или жанров в памяти процесса.
+
+    Таблицы маленькие и меняются редко, поэтому запись по slug или id
+    берётся из памяти, а не из базы. Актуальность сверяется с версией
+    пространства имён модели в общем кэше: её сбрасывают сигналы в
+    любом процессе, и при следующем обращении таблица читается заново.
+    Записи, добавленные в обход сигналов, находятся тоже: при промахе
+    таблица перечитывается один раз, прежде чем slug или id признаётся
+    неизвестным.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.namespace = model._meta.model_name
+        self.field_names = tuple(
+            field.attname for field in model._meta.concrete_fields
+        )
+        self.version = None
+        self.by_slug = {}
+        self.by_pk = {}
+        self._lock = threading.Lock()
+
+    def load(self, version=None):
+        """Читает таблицу одним запросом."""
+        # Версия берётся до чтения: изменение во время загрузки
+        # приведёт к повторной загрузке при следующем обращении.
+        if version is None:
+            version = get_version(self.namespace)
+        rows = list(self.model.objects.values_list(*self.field_names))
+        slug_index = self.field_names.index('slug')
+        with self._lock:
+            self.by_slug = {row[slug_index]: row for row in rows}
+            self.by_pk = {row[0]: row for row in rows}
+            self.version = version
+
+    def invalidate(self):
+        with self._lock:
+            self.version = None
+
+    def refresh(self):
+        """Перечитывает таблицу, если её версия изменилась."""
+        version = get_version(self.namespace)
+        if version == self.version:
+            return False
+        self.load(version)
+        return True
+
+    def instance(self, row):
+        return self.model.from_db(DEFAULT_DB_ALIAS, self.field_names, row)
+
+    def lookup(self, index, keys):
+        """
+        Строки с ключами keys из индекса by_slug или by_pk.
+
+        Если каких-то ключей нет, таблица перечитывается один раз. Внутри
+        транзакции не перечитывается: реестр общий для потоков процесса
+        и не должен видеть незафиксированные строки.
+        """
+        if not self.refresh() and not connection.in_atomic_block and not all(
+            key in getattr(self, index) for key in keys
+        ):
+            self.load()
+        rows = getattr(self, index)
+        return [rows[key] for key in keys if key in rows]
+
+    def get(self, slug):
+        """Объект модели со slug или None."""
+        rows = self.lookup('by_slug', (slug,))
+        return self.instance(rows[0]) if rows else None
+
+    def get_by_pk(self, pk):
+        rows = self.lookup('by_pk', (pk,))
+        return self.instance(rows[0]) if rows else None
+
+    def ids(self, slugs):
+        """Первичные ключи известных slug, неизвестные пропускаются."""
+        return [row[0] for row in self.lookup('by_slug', list(slugs))]
+
+
+categories = SlugRegistry(Category)
+genres = SlugRegistry(Genre)
+REGISTRIES = {Category: categories, Genre: genres}
+
+
+def warm_registries():
+    """
+    Заполняет реестры при запуске процесса.
+
+    Если база ещё не готова (например, до миграций), реестры
+    заполнятся при первом обращении.
+    """
+    try:
+        for registry in REGISTRIES.values():
+            registry.load()
+    except DatabaseError:
+        pass
@@ -1,3 +1,4 @@
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 
 from reviews.constants import (
@@ -8,6 +9,27 @@ from reviews.constants import (
 from reviews.models import Category, Title, Genre, Review, Comment, User
 from reviews.validators import validate_year, username_validator
 
+from .registry import REGISTRIES
+
+
+class RegistrySlugRelatedField(serializers.SlugRelatedField):
+    """Поле со slug категории или жанра, который ищется в реестре."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('slug_field', 'slug')
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        instance = REGISTRIES[self.get_queryset().model].get(data)
+        if instance is None:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+        return instance
+
 
 class GenreSerializer(serializers.ModelSerializer):
     """Сериализатор жанров."""
@@ -45,16 +67,12 @@ class TitleSafeSerializer(serializers.ModelSerializer):
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор произведений для POST, PATCH и DELETE-запросов."""
 
-    genre = serializers.SlugRelatedField(
+    genre = RegistrySlugRelatedField(
         queryset=Genre.objects.all(),
-        slug_field='slug',
         many=True,
         allow_empty=False,
     )
-    category = serializers.SlugRelatedField(
-        queryset=Category.objects.all(),
-        slug_field='slug',
-    )
+    category = RegistrySlugRelatedField(queryset=Category.objects.all())
 
     class Meta:
         model = Title
@@ -88,19 +106,16 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date',)
 
-    def validate(self, data):
-        """Валидация, запрещающая создать существующий отзыв."""
-        request = self.context['request']
-        if request.method != 'POST':
-            return data
 
-        if Review.objects.filter(
-            author=request.user,
-            title_id=self.context['view'].kwargs['title_id']
-        ).exists():
-            raise serializers.ValidationError('Отзыв уже существует!')
+class ReviewImportSerializer(serializers.ModelSerializer):
+    """Отзыв из массовой загрузки: произведение по id, автор по username."""
+
+    title = serializers.IntegerField()
+    author = serializers.CharField(max_length=USERNAME_LENGTH)
 
-        return data
+    class Meta:
+        model = Review
+        fields = ('title', 'author', 'text', 'score')
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import bulk_loaded
+
+from .authentication import forget_user
+from .cache import bump_on_commit
+from .pagination import count_namespace
+from .registry import REGISTRIES
+
+
+@receiver((post_save, post_delete), sender=Category)
+@receiver((post_save, post_delete), sender=Genre)
+def invalidate_catalogue(sender, instance, using, **kwargs):
+    """Сбрасывает кэш списков и зависящих произведений при изменении."""
+    model_name = sender._meta.model_name
+    bump_on_commit(
+        model_name,
+        f'{model_name}:{instance.pk}',
+        # Фильтры произведений ссылаются на slug категорий и жанров.
+        count_namespace(Title),
+        using=using
+    )
+    # Другие процессы заметят новую версию, текущий перечитает сразу.
+    transaction.on_commit(REGISTRIES[sender].invalidate, using=using)
+
+
+@receiver(bulk_loaded)
+def invalidate_bulk_loaded(sender, using, **kwargs):
+    """
+    Сбрасывает кэш количеств таблицы после массовой загрузки, а для
+    категорий и жанров - и их списки с реестром.
+    """
+    namespaces = [count_namespace(sender)]
+    if sender in REGISTRIES:
+        namespaces += [sender._meta.model_name, count_namespace(Title)]
+        transaction.on_commit(REGISTRIES[sender].invalidate, using=using)
+    bump_on_commit(*namespaces, using=using)
+
+
+@receiver((post_save, post_delete), sender=Title)
+def invalidate_title(sender, instance, using, **kwargs):
+    bump_on_commit(f'title:{instance.pk}', using=using)
+
+
+@receiver((post_save, post_delete), sender=Category)
+@receiver((post_save, post_delete), sender=Genre)
+@receiver((post_save, post_delete), sender=Title)
+@receiver((post_save, post_delete), sender=Review)
+@receiver((post_save, post_delete), sender=Comment)
+@receiver((post_save, post_delete), sender=User)
+def invalidate_counts(sender, using, **kwargs):
+    """Сбрасывает кэшированные количества объектов для пагинации."""
+    bump_on_commit(count_namespace(sender), using=using)
+
+
+@receiver((post_save, post_delete), sender=Review)
+def invalidate_title_rating(sender, instance, using, **kwargs):
+    """Рейтинг в кэше произведения меняется вместе с отзывами."""
+    bump_on_commit(f'title:{instance.title_id}', using=using)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            using, **kwargs):
+    if not action.startswith('post_'):
+        return
+    bump_on_commit(count_namespace(Title), using=using)
+    if not reverse:
+        bump_on_commit(f'title:{instance.pk}', using=using)
+        return
+    # Со стороны жанра затронуты все его произведения: при clear их
+    # список неизвестен, поэтому сбрасывается тег самого жанра.
+    bump_on_commit(
+        f'genre:{instance.pk}',
+        *(f'title:{pk}' for pk in pk_set or ()),
+        using=using
+    )
+
+
+@receiver((post_save, post_delete), sender=User)
+def invalidate_user(sender, instance, using, **kwargs):
+    """Сбрасывает закэшированного для аутентификации пользователя."""
+    pk = instance.pk
+    transaction.on_commit(lambda: forget_user(pk), using=using)
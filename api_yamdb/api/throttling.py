@@ -0,0 +1,92 @@
+import hashlib
+from collections.abc import Mapping
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты запросов по алгоритму «корзины токенов».
+
+    Ёмкость корзины и скорость её пополнения задаются строкой вида
+    '5/min' в AUTH_THROTTLE_RATES: корзина вмещает 5 запросов и
+    заполняется заново за минуту. В отличие от скользящего окна
+    SimpleRateThrottle в кэше хранится только остаток токенов и время
+    последнего запроса.
+
+    Чтение и запись корзины не атомарны: одновременные запросы могут
+    прочитать одно и то же состояние, и тогда сверх лимита проходит не
+    больше запросов, чем обрабатывается параллельно. Для ограничения
+    подбора кодов такой погрешности достаточно.
+    """
+
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        return settings.AUTH_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.now = self.timer()
+        tokens, updated_at = self.cache.get(
+            self.key, (self.num_requests, self.now)
+        )
+        self.tokens = min(
+            self.num_requests,
+            tokens
+            + (self.now - updated_at) * self.num_requests / self.duration
+        )
+        if self.tokens < 1:
+            return False
+        self.cache.set(self.key, (self.tokens - 1, self.now), self.duration)
+        return True
+
+    def wait(self):
+        """Секунды до появления в корзине следующего токена."""
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class IPThrottle(TokenBucketThrottle):
+    """Корзина токенов для каждого IP-адреса."""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)
+        }
+
+
+class UsernameThrottle(TokenBucketThrottle):
+    """Корзина токенов для каждого username из тела запроса."""
+
+    def get_cache_key(self, request, view):
+        # Тело не объект JSON: запрос отклонит сериализатор.
+        if not isinstance(request.data, Mapping):
+            return None
+        username = request.data.get('username')
+        if not username:
+            return None
+        # username ещё не проверен сериализатором, поэтому в ключ кэша
+        # попадает его хэш.
+        ident = hashlib.md5(str(username).encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class SignUpIPThrottle(IPThrottle):
+    scope = 'signup_ip'
+
+
+class SignUpUsernameThrottle(UsernameThrottle):
+    scope = 'signup_username'
+
+
+class TokenIPThrottle(IPThrottle):
+    scope = 'token_ip'
+
+
+class TokenUsernameThrottle(UsernameThrottle):
+    scope = 'token_username'
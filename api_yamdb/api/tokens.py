@@ -0,0 +1,18 @@
+from rest_framework_simplejwt.tokens import AccessToken
+
+VERSION_CLAIM = 'ver'
+
+# Утверждения, из которых собирается пользователь без запроса к БД.
+USER_CLAIMS = ('username', 'role', 'is_staff', 'is_active')
+
+
+class RoleAccessToken(AccessToken):
+    """Токен доступа с ролью пользователя и версией токенов."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        token[VERSION_CLAIM] = user.token_version
+        return token
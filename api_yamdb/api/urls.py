@@ -1,7 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import UsersViewSet, get_token, signup
+from api.views import UsersViewSet, bulk_reviews, get_token, signup
 from .views import (
     CategoryViewSet,
     GenreViewSet,
@@ -34,4 +34,5 @@ auth_url = [
 urlpatterns = [
     path('v1/', include(v1_router.urls)),
     path('v1/auth/', include(auth_url)),
+    path('v1/reviews/bulk/', bulk_reviews, name='reviews-bulk'),
 ]
@@ -1,15 +1,62 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from reviews.mailing import enqueue_email
+from reviews.models import User
 
 
 def send_confirmation_code_to_email(user):
-    """Отправление письма с кодом авторизации."""
+    """
+    Постановка в очередь письма с кодом авторизации.
+
+    Повторные запросы в течение CONFIRMATION_EMAIL_WINDOW секунд письмо
+    не отправляют: код из первого письма остаётся действительным.
+    Возвращает True, если письмо поставлено в очередь.
+    """
+    if not cache.add(
+        f'confirmation-email:{user.pk}', True,
+        settings.CONFIRMATION_EMAIL_WINDOW
+    ):
+        return False
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    enqueue_email(
         'Код подтвержения для завершения регистрации',
         f'Ваш код для получения JWT токена {confirmation_code}',
-        settings.ADMIN_EMAIL,
-        (user.email,),
-        fail_silently=False,
+        user.email,
+    )
+    return True
+
+
+def find_signup_users(username, email):
+    """Пользователи, у которых совпадает username или email."""
+    return list(User.objects.filter(Q(username=username) | Q(email=email)))
+
+
+def register_user(username, email):
+    """
+    Пользователь с парой username и email, созданный при необходимости.
+
+    Новый и вернувшийся пользователь, как и конфликт, определяются одним
+    запросом. Если username или email занят другим пользователем,
+    выбрасывается ValidationError.
+    """
+    users = find_signup_users(username, email)
+    if not users:
+        try:
+            with transaction.atomic():
+                return User.objects.create(username=username, email=email)
+        except IntegrityError:
+            # Пользователя успели создать параллельным запросом.
+            users = find_signup_users(username, email)
+    for user in users:
+        if user.username == username and user.email == email:
+            return user
+    raise ValidationError(
+        {'username': 'Username уже занят.'}
+        if any(user.username == username for user in users)
+        else {'email': 'Email уже занят.'}
     )
@@ -1,24 +1,46 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.db import IntegrityError
-from django.db.models import Avg
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from rest_framework import filters, status, viewsets, mixins
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action,
+    api_view,
+    parser_classes,
+    permission_classes,
+    throttle_classes
+)
 from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-
+from rest_framework.settings import api_settings
+
+from api.authentication import complete_user
+from api.bulk import (
+    bulk_items,
+    create_titles,
+    import_reviews,
+    validate_items
+)
+from api.cache import (
+    CachedListMixin,
+    etag_response,
+    title_cache,
+    title_tags
+)
 from api.filters import TitleFilter
+from api.pagination import OptionalCursorPagination
 from api.permissions import (
     IsAdminModeratorAuthorOrReadOnly,
     IsAdmin,
+    IsAdminOrModerator,
     IsAdminUserOrReadOnly
 )
 from reviews.models import Category, Genre, Title, Review, User
 
+from .parsers import NDJSONParser
 from .serializers import (
     AuthTokenSerializer,
     CategorySerializer,
@@ -31,10 +53,18 @@ from .serializers import (
     UserSerializer
 )
 
-from .utils import send_confirmation_code_to_email
+from .throttling import (
+    SignUpIPThrottle,
+    SignUpUsernameThrottle,
+    TokenIPThrottle,
+    TokenUsernameThrottle
+)
+from .tokens import RoleAccessToken
+from .utils import register_user, send_confirmation_code_to_email
 
 
 class MixinSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -48,27 +78,47 @@ class MixinSet(
     lookup_field = 'slug'
 
 
+class NestedResourceMixin:
+    """
+    Родительский объект вложенного маршрута.
+
+    Объект выбирается одним запросом по всем параметрам URL из
+    parent_lookups, поэтому ребёнок чужого родителя даёт 404, и
+    кэшируется на запросе до его завершения.
+    """
+
+    parent_model = None
+    parent_lookups = {}
+    parent_select_related = ()
+
+    def get_parent(self):
+        parent = getattr(self.request, '_nested_parent', None)
+        if parent is None:
+            parent = get_object_or_404(
+                self.parent_model.objects.select_related(
+                    *self.parent_select_related
+                ),
+                **{
+                    field: self.kwargs[kwarg]
+                    for field, kwarg in self.parent_lookups.items()
+                }
+            )
+            self.request._nested_parent = parent
+        return parent
+
+
 @api_view(('POST',))
 @permission_classes((AllowAny,))
+@throttle_classes((SignUpIPThrottle, SignUpUsernameThrottle))
 def signup(request):
     """Регистрация нового пользователя."""
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    validated_data = serializer.validated_data
-    username = validated_data['username']
-    email = validated_data['email']
-    try:
-        user, _ = User.objects.get_or_create(
-            username=username,
-            email=email
-        )
-        send_confirmation_code_to_email(user)
-    except IntegrityError:
-        raise ValidationError(
-            {'username': 'Username уже занят.'}
-            if User.objects.filter(username=username).exists()
-            else {'email': 'Email уже занят.'}
-        )
+    user = register_user(
+        serializer.validated_data['username'],
+        serializer.validated_data['email']
+    )
+    send_confirmation_code_to_email(user)
 
     return Response(
         {
@@ -81,6 +131,7 @@ def signup(request):
 
 @api_view(('POST',))
 @permission_classes((AllowAny,))
+@throttle_classes((TokenIPThrottle, TokenUsernameThrottle))
 def get_token(request):
     """Получение токена доступа."""
     serializer = AuthTokenSerializer(data=request.data)
@@ -96,11 +147,32 @@ def get_token(request):
         )
 
     return Response(
-        {'token': str(RefreshToken.for_user(user).access_token)},
+        {'token': str(RoleAccessToken.for_user(user))},
         status=status.HTTP_200_OK
     )
 
 
+@api_view(('POST',))
+@permission_classes((IsAdminOrModerator,))
+@parser_classes((JSONParser, NDJSONParser))
+def bulk_reviews(request):
+    """
+    Массовая загрузка отзывов из JSON-массива или потока NDJSON.
+
+    Объект содержит id произведения, username автора, текст и оценку.
+    В ответе для каждого объекта по порядку указаны ошибки проверки,
+    если отзыв не создан.
+    """
+    results, created = import_reviews(request.data, {'request': request})
+    return Response(
+        results,
+        status=(
+            status.HTTP_201_CREATED if created
+            else status.HTTP_400_BAD_REQUEST
+        )
+    )
+
+
 class TitleViewSet(viewsets.ModelViewSet):
     """
     Вьюсет для отображение произведени(я/ий).
@@ -108,9 +180,9 @@ class TitleViewSet(viewsets.ModelViewSet):
     А также для их редактирования, чтения и удаления.
     """
 
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).order_by(*Title._meta.ordering)
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     permission_classes = (IsAdminUserOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
@@ -121,12 +193,86 @@ class TitleViewSet(viewsets.ModelViewSet):
             return TitleSafeSerializer
         return TitleSerializer
 
+    def serialize_cached(self, titles):
+        """Представления произведений из кэша, промахи сериализуются."""
+        titles = list(titles)
+        entries = title_cache.get_many([title.pk for title in titles])
+        if len(entries) == len(titles):
+            self.cache_status = 'HIT'
+        else:
+            self.cache_status = 'PARTIAL' if entries else 'MISS'
+        entries.update(title_cache.set_many([
+            (title.pk, self.get_serializer(title).data, title_tags(title))
+            for title in titles if title.pk not in entries
+        ]))
+        return [entries[title.pk]['data'] for title in titles]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            response = etag_response(
+                request, self.serialize_cached(queryset)
+            )
+        else:
+            response = self.get_paginated_response(
+                self.serialize_cached(page)
+            )
+            response = etag_response(
+                request, response.data, response=response
+            )
+        response['X-Cache'] = self.cache_status
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        entry = title_cache.get(kwargs[self.lookup_field])
+        cache_status = 'HIT'
+        if entry is None:
+            title = self.get_object()
+            entry = title_cache.set(
+                title.pk, self.get_serializer(title).data, title_tags(title)
+            )
+            cache_status = 'MISS'
+        response = etag_response(request, entry['data'], entry['etag'])
+        response['X-Cache'] = cache_status
+        return response
+
+    @action(
+        methods=('post',),
+        detail=False,
+        permission_classes=(IsAdmin,),
+        parser_classes=(JSONParser, NDJSONParser),
+    )
+    def bulk(self, request):
+        """
+        Массовое создание произведений из JSON-массива или NDJSON.
+
+        Каждый объект проверяется как в обычном POST-запросе, корректные
+        записываются вместе. В ответе для каждого объекта по порядку
+        указан id созданного произведения или ошибки проверки.
+        """
+        items = bulk_items(request.data)
+        valid, results = validate_items(
+            TitleSerializer, items, self.get_serializer_context()
+        )
+        titles = create_titles(valid) if valid else []
+        for (index, _), title in zip(valid, titles):
+            results[index] = {'index': index, 'id': title.pk}
+        return Response(
+            [results[index] for index in range(len(items))],
+            status=(
+                status.HTTP_201_CREATED if titles
+                else status.HTTP_400_BAD_REQUEST
+            )
+        )
+
 
 class CategoryViewSet(MixinSet):
     """Вьюсет для отображения категории, ее удаления и чтения."""
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_namespace = 'category'
 
 
 class GenreViewSet(MixinSet):
@@ -134,45 +280,61 @@ class GenreViewSet(MixinSet):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_namespace = 'genre'
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(NestedResourceMixin, viewsets.ModelViewSet):
     """ViewSet модели отзывов."""
 
     serializer_class = ReviewSerializer
     http_method_names = ('get', 'post', 'patch', 'delete')
     permission_classes = (IsAdminModeratorAuthorOrReadOnly,)
+    pagination_class = OptionalCursorPagination
+    parent_model = Title
+    parent_lookups = {'pk': 'title_id'}
 
     def get_title(self):
-        """Получаем произведение для отзыва."""
-        return get_object_or_404(Title, pk=self.kwargs['title_id'])
+        """Получаем произведение для отзыва один раз за запрос."""
+        return self.get_parent()
 
     def get_queryset(self):
         """Получаем отзывы к конкретному произведению."""
-        return self.get_title().reviews.all()
+        return self.get_title().reviews.select_related('author')
 
     def perform_create(self, serializer):
-        """Добавляем авторизованного пользователя к отзыву."""
-        serializer.save(author=self.request.user, title=self.get_title())
+        """
+        Добавляем авторизованного пользователя к отзыву.
+
+        Повторный отзыв отсекает ограничение unique_author_title, а не
+        предварительный запрос: так нет лишнего обращения к БД и гонки
+        между проверкой и вставкой.
+        """
+        try:
+            serializer.save(author=self.request.user, title=self.get_title())
+        except IntegrityError:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ['Отзыв уже существует!']}
+            )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(NestedResourceMixin, viewsets.ModelViewSet):
     """Viewset модели комментариев."""
 
     serializer_class = CommentSerializer
     http_method_names = ('get', 'post', 'patch', 'delete')
     permission_classes = (IsAdminModeratorAuthorOrReadOnly,)
+    pagination_class = OptionalCursorPagination
+    parent_model = Review
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
+    parent_select_related = ('title',)
 
     def get_review(self):
-        """Получаем отзыв для комментария."""
-        return get_object_or_404(
-            Review,
-            pk=self.kwargs['review_id'],
-        )
+        """Получаем отзыв произведения из URL для комментария."""
+        return self.get_parent()
 
     def get_queryset(self):
         """Получаем комментарии к конкретному отзыву."""
-        return self.get_review().comments.all()
+        return self.get_review().comments.select_related('author')
 
     def perform_create(self, serializer):
         """Присваиваем автора комментарию."""
@@ -199,14 +361,17 @@ class UsersViewSet(viewsets.ModelViewSet):
     def profile(self, request):
         if request.method != 'PATCH':
             return Response(
-                UserSerializer(request.user).data,
+                UserSerializer(complete_user(request.user)).data,
                 status=status.HTTP_200_OK
             )
+        # request.user может быть собран из кэша без части полей,
+        # поэтому изменения записываются в пользователя из базы.
+        user = get_object_or_404(User, pk=request.user.pk)
         serializer = UserSerializer(
-            request.user,
+            user,
             data=request.data,
             partial=True
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save(role=request.user.role)
+        serializer.save(role=user.role)
         return Response(serializer.data, status=status.HTTP_200_OK)
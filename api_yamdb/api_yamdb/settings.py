@@ -37,16 +37,20 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CachedCountPagination',
     'PAGE_SIZE': 5,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    # Ограничения частоты запросов по IP берут адрес из REMOTE_ADDR:
+    # X-Forwarded-For подделывается клиентом. За обратным прокси здесь
+    # указывается число прокси перед приложением.
+    'NUM_PROXIES': 0,
 }
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -77,6 +81,20 @@ DATABASES = {
     }
 }
 
+# Бэкенд кэша задаётся окружением: в разработке и тестах - память
+# процесса, в продакшене - общий для всех процессов Redis:
+# CACHE_BACKEND=django_redis.cache.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+# Без DEBUG кэш в памяти процесса не проходит проверку api.E001.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -113,12 +131,43 @@ AUTH_USER_MODEL = 'reviews.User'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Письма отправляет обработчик очереди (manage.py send_emails). В режиме
+# EMAIL_QUEUE_EAGER они отправляются сразу при постановке в очередь.
+EMAIL_QUEUE_EAGER = False
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETRY_DELAY = 30
+# Письма, которые обработчик не отправил за это время (например, он упал),
+# снова забираются в работу.
+EMAIL_QUEUE_LEASE_TIMEOUT = 60 * 10
+# Отправленные и недоставленные письма хранятся столько секунд, затем
+# обработчик очереди их удаляет.
+EMAIL_QUEUE_RETENTION = 60 * 60 * 24 * 7
+# Повторная регистрация в течение этого времени не отправляет новое письмо.
+CONFIRMATION_EMAIL_WINDOW = 60
+
+# Корзины токенов для регистрации и получения токена: по IP-адресу и по
+# username. Строка '10/min' - 10 запросов подряд, затем 10 в минуту.
+AUTH_THROTTLE_RATES = {
+    'signup_ip': '30/min',
+    'signup_username': '5/min',
+    'token_ip': '30/min',
+    'token_username': '10/min',
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
     'AUTH_HEADER_TYPES': ('Bearer',),
-    'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'AUTH_TOKEN_CLASSES': ('api.tokens.RoleAccessToken',),
 }
 
 
+# Массовая загрузка: объектов в одном запросе и строк в одном INSERT.
+BULK_MAX_ITEMS = 10000
+BULK_BATCH_SIZE = 1000
+
 ADMIN_EMAIL = 'admin@yamdb.com'
 ENDPOINT_USER_INFO = 'me'
+
+CATALOGUE_CACHE_TIMEOUT = 60 * 15
+PAGINATION_COUNT_CACHE_TIMEOUT = 60
+USER_CACHE_TIMEOUT = 60 * 5
@@ -2,7 +2,9 @@ from django.contrib import admin
 from django.db import models
 from django.forms import Textarea
 
-from reviews.models import Category, Genre, Title, Review, Comment, User
+from reviews.models import (
+    Category, Genre, Title, Review, Comment, User, OutgoingEmail
+)
 
 
 @admin.register(User)
@@ -94,3 +96,21 @@ class CommentAdmin(admin.ModelAdmin):
     )
     search_fields = ('review',)
     list_filter = ('review', 'author',)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """Админ панель очереди писем."""
+
+    list_display = (
+        'recipient',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    search_fields = ('recipient',)
+    list_filter = ('status',)
+    # В тексте писем коды подтверждения.
+    exclude = ('body',)
@@ -25,3 +25,22 @@ ROLE_CHOICES = (
     (MODERATOR, 'Модератор'),
     (ADMIN, 'Админ'),
 )
+
+EMAIL_PENDING = 'pending'
+
+EMAIL_SENDING = 'sending'
+
+EMAIL_SENT = 'sent'
+
+EMAIL_FAILED = 'failed'
+
+EMAIL_STATUS_CHOICES = (
+    (EMAIL_PENDING, 'Ожидает отправки'),
+    (EMAIL_SENDING, 'Отправляется'),
+    (EMAIL_SENT, 'Отправлено'),
+    (EMAIL_FAILED, 'Не доставлено'),
+)
+
+SUBJECT_LENGTH = 256
+
+WORKER_ID_LENGTH = 32
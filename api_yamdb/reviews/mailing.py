@@ -0,0 +1,204 @@
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .constants import EMAIL_FAILED, EMAIL_PENDING, EMAIL_SENDING, EMAIL_SENT
+from .models import OutgoingEmail
+
+
+def enqueue_email(subject, body, recipient):
+    """
+    Ставит письмо в очередь.
+
+    В режиме EMAIL_QUEUE_EAGER письмо сразу же отправляется в текущем
+    потоке, как это делал бы обработчик очереди.
+    """
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=settings.ADMIN_EMAIL,
+        recipient=recipient,
+    )
+    if settings.EMAIL_QUEUE_EAGER:
+        deliver(claim((email.pk,)))
+    return email
+
+
+def expired_lease():
+    """Письма в работе, которые обработчик держит дольше срока аренды."""
+    return Q(
+        status=EMAIL_SENDING,
+        claimed_at__lt=timezone.now() - timedelta(
+            seconds=settings.EMAIL_QUEUE_LEASE_TIMEOUT
+        ),
+    )
+
+
+def claim(ids, worker=None):
+    """
+    Забирает письма в работу обработчику worker.
+
+    Письма, которые уже забрал другой обработчик, не обновятся и
+    в результат не попадут, если только его аренда не истекла.
+    """
+    worker = worker or uuid.uuid4().hex
+    OutgoingEmail.objects.filter(
+        Q(status=EMAIL_PENDING) | expired_lease(), pk__in=ids
+    ).update(status=EMAIL_SENDING, worker=worker, claimed_at=timezone.now())
+    return list(
+        OutgoingEmail.objects.filter(worker=worker, status=EMAIL_SENDING)
+    )
+
+
+def claim_pending(batch_size):
+    """
+    Забирает в работу очередную пачку писем, время которых пришло.
+
+    Вместе с ними забираются письма упавших обработчиков: такое письмо
+    могло успеть уйти, поэтому доставка гарантируется по принципу
+    «хотя бы один раз».
+    """
+    ids = OutgoingEmail.objects.filter(
+        Q(status=EMAIL_PENDING, next_attempt_at__lte=timezone.now())
+        | expired_lease()
+    ).values_list('pk', flat=True)[:batch_size]
+    return claim(list(ids))
+
+
+def purge_finished():
+    """
+    Удаляет письма, обработанные раньше EMAIL_QUEUE_RETENTION секунд назад.
+
+    Возвращает число удалённых писем.
+    """
+    deleted, _ = OutgoingEmail.objects.filter(
+        status__in=(EMAIL_SENT, EMAIL_FAILED),
+        claimed_at__lt=timezone.now() - timedelta(
+            seconds=settings.EMAIL_QUEUE_RETENTION
+        ),
+    ).delete()
+    return deleted
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return timedelta(
+        seconds=settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+class MailMetrics:
+    """
+    Счётчики отправки писем текущего процесса.
+
+    seconds - суммарное время отправки во всех потоках, а скорость
+    считается по времени от reset() до снимка: при нескольких потоках
+    их время пересекается.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.sent = 0
+            self.failed = 0
+            self.batches = 0
+            self.connections = 0
+            self.seconds = 0.0
+            self.started = time.monotonic()
+
+    def record(self, sent, failed, connections, seconds):
+        with self._lock:
+            self.sent += sent
+            self.failed += failed
+            self.batches += 1
+            self.connections += connections
+            self.seconds += seconds
+
+    def snapshot(self):
+        """Счётчики и скорость отправки в письмах в секунду."""
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                'sent': self.sent,
+                'failed': self.failed,
+                'batches': self.batches,
+                'connections': self.connections,
+                'seconds': self.seconds,
+                'elapsed': elapsed,
+                'per_second': self.sent / elapsed if elapsed else 0.0,
+            }
+
+
+metrics = MailMetrics()
+
+
+def deliver(emails, connection=None):
+    """
+    Отправляет пачку писем через одно соединение с почтовым сервером.
+
+    Переданное соединение остаётся открытым для следующих пачек, а
+    оборванное соединение открывается заново. Без connection письма
+    отправляются через новое соединение, которое закрывается в конце.
+    Неудачные письма возвращаются в очередь с отложенной попыткой, а
+    после EMAIL_QUEUE_MAX_ATTEMPTS попыток помечаются недоставленными.
+    Текст отправленных и недоставленных писем стирается: в нём коды
+    подтверждения.
+    Возвращает число отправленных писем.
+    """
+    if not emails:
+        return 0
+    own_connection = connection is None
+    connection = connection or get_connection()
+    started = time.monotonic()
+    sent = connections = 0
+    for email in emails:
+        email.attempts += 1
+        try:
+            if connection.open():
+                connections += 1
+            # Каждое письмо отправляется отдельным send_messages через
+            # уже открытое соединение: так известен исход каждого письма.
+            connection.send_messages([EmailMessage(
+                email.subject,
+                email.body,
+                email.from_email,
+                (email.recipient,),
+            )])
+        except Exception as error:
+            # После ошибки соединение может быть в неизвестном состоянии.
+            connection.close()
+            email.last_error = str(error)
+            if email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+                email.status = EMAIL_FAILED
+                email.body = ''
+            else:
+                email.status = EMAIL_PENDING
+                email.next_attempt_at = (
+                    timezone.now() + retry_delay(email.attempts)
+                )
+        else:
+            email.status = EMAIL_SENT
+            email.sent_at = timezone.now()
+            email.body = ''
+            sent += 1
+        email.worker = ''
+    if own_connection:
+        connection.close()
+    OutgoingEmail.objects.bulk_update(
+        emails,
+        ('status', 'attempts', 'next_attempt_at', 'worker', 'last_error',
+         'sent_at', 'body')
+    )
+    metrics.record(
+        sent, len(emails) - sent, connections, time.monotonic() - started
+    )
+    return sent
@@ -0,0 +1,288 @@
+import csv
+import os
+import random
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from reviews.constants import MAX_SCORE, MIN_SCORE, ROLE_CHOICES
+from reviews.management.commands.load_csv import batched
+from reviews.models import Category, Genre, Title, Review, Comment, User
+from reviews.search import title_search
+from reviews.signals import bulk_loaded
+
+# Файл, модель и столбцы в формате, который читает load_csv.
+TABLES = (
+    ('category.csv', Category, ('id', 'name', 'slug')),
+    ('genre.csv', Genre, ('id', 'name', 'slug')),
+    (
+        'users.csv',
+        User,
+        ('id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name')
+    ),
+    ('titles.csv', Title, ('id', 'name', 'year', 'category')),
+    ('genre_title.csv', Title.genre.through, ('id', 'title_id', 'genre_id')),
+    (
+        'review.csv',
+        Review,
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date')
+    ),
+    (
+        'comments.csv',
+        Comment,
+        ('id', 'review_id', 'text', 'author', 'pub_date')
+    ),
+)
+
+# Столбцы CSV, которые в модели называются иначе.
+ATTNAMES = {'category': 'category_id', 'author': 'author_id'}
+
+# Даты отсчитываются от фиксированного момента, чтобы набор данных
+# зависел только от --seed.
+BASE_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+WORDS = (
+    'тёмный', 'город', 'последний', 'рассвет', 'тайна', 'море', 'дорога',
+    'звезда', 'песня', 'зима', 'огонь', 'сад', 'ветер', 'дом', 'время',
+)
+
+
+@contextmanager
+def seeded_dates(model):
+    """
+    Временно отключает auto_now_add у полей модели.
+
+    Иначе bulk_create заменит сгенерированные даты текущим временем.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = "Генерация воспроизводимого набора данных для нагрузочных тестов"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument(
+            '--max-reviews',
+            type=int,
+            default=1000,
+            help=(
+                'Ожидаемое число отзывов у самого популярного произведения.'
+            ),
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа отзывов по произведениям.',
+        )
+        parser.add_argument(
+            '--comments',
+            type=float,
+            default=2.0,
+            help='Среднее число комментариев к отзыву.',
+        )
+        parser.add_argument(
+            '--max-genres',
+            type=int,
+            default=4,
+            help='Наибольшее число жанров у произведения.',
+        )
+        parser.add_argument(
+            '--output',
+            help=(
+                'Каталог для CSV-файлов в формате load_csv. Без него '
+                'данные записываются прямо в базу.'
+            ),
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['max_reviews'] > options['users']:
+            raise CommandError(
+                '--max-reviews не может превышать --users: у пользователя '
+                'может быть только один отзыв на произведение.'
+            )
+        self.options = options
+        rows = {
+            'category.csv': self.categories(),
+            'genre.csv': self.genres(),
+            'users.csv': self.users(),
+            'titles.csv': self.titles(),
+            'genre_title.csv': self.genre_titles(),
+            'review.csv': self.reviews(),
+            'comments.csv': self.comments(),
+        }
+        for filename, model, columns in TABLES:
+            if options['output']:
+                written = self.write_csv(filename, columns, rows[filename])
+            else:
+                written = self.write_db(model, rows[filename])
+            self.stdout.write(self.style.SUCCESS(
+                f"{filename}: {written} строк."
+            ))
+        if not options['output']:
+            Title.objects.rebuild_ratings()
+            title_search().rebuild()
+
+    def rng(self, table):
+        """Отдельный генератор на таблицу: таблицы не влияют друг на друга."""
+        return random.Random(f"{self.options['seed']}-{table}")
+
+    def write_csv(self, filename, columns, rows):
+        os.makedirs(self.options['output'], exist_ok=True)
+        written = 0
+        with open(
+            os.path.join(self.options['output'], filename), 'w',
+            encoding='utf-8', newline=''
+        ) as file:
+            writer = csv.DictWriter(file, fieldnames=columns)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                written += 1
+        return written
+
+    def write_db(self, model, rows):
+        written = 0
+        with seeded_dates(model), transaction.atomic():
+            objects = (
+                model(**{
+                    ATTNAMES.get(column, column): value
+                    for column, value in row.items()
+                })
+                for row in rows
+            )
+            for batch in batched(objects, self.options['batch_size']):
+                model.objects.bulk_create(batch)
+                written += len(batch)
+        bulk_loaded.send(sender=model, using=DEFAULT_DB_ALIAS)
+        return written
+
+    def categories(self):
+        for idx in range(1, self.options['categories'] + 1):
+            yield {'id': idx, 'name': f'Категория {idx}', 'slug': f'cat-{idx}'}
+
+    def genres(self):
+        for idx in range(1, self.options['genres'] + 1):
+            yield {'id': idx, 'name': f'Жанр {idx}', 'slug': f'genre-{idx}'}
+
+    def users(self):
+        rng = self.rng('users')
+        roles = [role for role, _ in ROLE_CHOICES]
+        for idx in range(1, self.options['users'] + 1):
+            yield {
+                'id': idx,
+                'username': f'user{idx}',
+                'email': f'user{idx}@yamdb.fake',
+                # Подавляющее большинство - обычные пользователи.
+                'role': rng.choices(roles, weights=(98, 1.5, 0.5))[0],
+                'bio': '',
+                'first_name': '',
+                'last_name': '',
+            }
+
+    def titles(self):
+        rng = self.rng('titles')
+        for idx in range(1, self.options['titles'] + 1):
+            yield {
+                'id': idx,
+                'name': ' '.join(rng.sample(WORDS, 3)).capitalize(),
+                'year': rng.randint(1900, BASE_DATE.year),
+                'category': rng.randint(1, self.options['categories']),
+            }
+
+    def genre_titles(self):
+        rng = self.rng('genre_title')
+        genres = range(1, self.options['genres'] + 1)
+        link_id = 0
+        for title_id in range(1, self.options['titles'] + 1):
+            # Чаще всего у произведения один-два жанра.
+            count = rng.randint(
+                1, rng.randint(1, min(self.options['max_genres'], len(genres)))
+            )
+            for genre_id in rng.sample(genres, count):
+                link_id += 1
+                yield {
+                    'id': link_id, 'title_id': title_id, 'genre_id': genre_id
+                }
+
+    def review_counts(self):
+        """
+        Число отзывов по произведениям по закону Ципфа.
+
+        Произведение для каждого отзыва выбирается с весом 1 / rank ** zipf,
+        поэтому отзывы получают и произведения из длинного хвоста. Ранги
+        случайно распределены между произведениями, так что популярные
+        произведения не идут подряд по id.
+        """
+        rng = self.rng('review_counts')
+        ranks = list(range(1, self.options['titles'] + 1))
+        rng.shuffle(ranks)
+        weights = [1 / rank ** self.options['zipf'] for rank in ranks]
+        total = round(self.options['max_reviews'] * sum(weights))
+        drawn = Counter(
+            rng.choices(range(len(ranks)), weights=weights, k=total)
+        )
+        # У пользователя только один отзыв на произведение.
+        return [
+            min(drawn[idx], self.options['users']) for idx in range(len(ranks))
+        ]
+
+    def reviews(self):
+        rng = self.rng('reviews')
+        users = range(1, self.options['users'] + 1)
+        review_id = 0
+        for title_id, count in enumerate(self.review_counts(), 1):
+            for author in rng.sample(users, count):
+                review_id += 1
+                yield {
+                    'id': review_id,
+                    'title_id': title_id,
+                    'text': ' '.join(rng.choices(WORDS, k=12)),
+                    'author': author,
+                    'score': rng.randint(MIN_SCORE, MAX_SCORE),
+                    'pub_date': BASE_DATE - timedelta(
+                        seconds=rng.randint(0, 10 ** 8)
+                    ),
+                }
+
+    def comments(self):
+        rng = self.rng('comments')
+        total_reviews = sum(self.review_counts())
+        comment_id = 0
+        for review_id in range(1, total_reviews + 1):
+            # Экспоненциальное распределение даёт длинный хвост
+            # обсуждаемых отзывов при заданном среднем.
+            count = (
+                int(rng.expovariate(1 / self.options['comments']))
+                if self.options['comments'] > 0 else 0
+            )
+            for _ in range(count):
+                comment_id += 1
+                yield {
+                    'id': comment_id,
+                    'review_id': review_id,
+                    'text': ' '.join(rng.choices(WORDS, k=6)),
+                    'author': rng.randint(1, self.options['users']),
+                    'pub_date': BASE_DATE - timedelta(
+                        seconds=rng.randint(0, 10 ** 8)
+                    ),
+                }
@@ -1,125 +1,405 @@
 import csv
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from itertools import islice
 
 from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
 
 from reviews.models import Category, Genre, Title, Review, Comment, User
+from reviews.search import title_search
+from reviews.signals import bulk_loaded
+
+CONFLICT_IGNORE = 'ignore'
+CONFLICT_UPDATE = 'update'
+
+# Таблица, метод загрузки и таблицы, на которые она ссылается.
+LOADERS = (
+    ('categories', 'load_categories', ()),
+    ('genres', 'load_genres', ()),
+    ('users', 'load_users', ()),
+    ('titles', 'load_titles', ('categories',)),
+    ('genre_titles', 'load_genre_titles', ('titles', 'genres')),
+    ('reviews', 'load_reviews', ('titles', 'users')),
+    ('comments', 'load_comments', ('reviews', 'users')),
+)
+
+
+def batched(iterable, size):
+    """Разбивает поток объектов на списки длиной не больше size."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def closing_connection(func):
+    """Закрывает соединение с БД потока после выполнения задачи."""
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connection.close()
+    return wrapper
 
 
 class Command(BaseCommand):
     help = "Импорт данных из CSV в базу данных"
 
-    def handle(self, *args, **kwargs):
-        self.load_categories()
-        self.load_genres()
-        self.load_users()
-        self.load_titles()
-        self.load_genre_titles()
-        self.load_reviews()
-        self.load_comments()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join('static', 'data'),
+            help='Каталог с CSV-файлами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одном bulk_create.',
+        )
+        parser.add_argument(
+            '--conflicts',
+            choices=(CONFLICT_IGNORE, CONFLICT_UPDATE),
+            default=CONFLICT_IGNORE,
+            help=(
+                'Что делать с уже существующими записями: '
+                'пропускать (ignore) или обновлять (update).'
+            ),
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help=(
+                'Количество потоков. Независимые таблицы загружаются '
+                'одновременно, большие файлы делятся на части.'
+            ),
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50000,
+            help='Количество строк в одной части файла при --workers > 1.',
+        )
+
+    def handle(self, *args, **options):
+        self.path = options['path']
+        self.batch_size = options['batch_size']
+        self.conflicts = options['conflicts']
+        self.workers = max(options['workers'], 1)
+        self.chunk_size = options['chunk_size']
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+        # SQLite допускает только одного пишущего: потоки параллельно
+        # разбирают файлы, а запись выполняют по очереди.
+        self.write_lock = (
+            threading.Lock() if connection.vendor == 'sqlite'
+            else nullcontext()
+        )
+        if self.workers == 1:
+            for _, method, _ in LOADERS:
+                getattr(self, method)()
+        else:
+            self.load_parallel()
+        self.report()
+
+    def load_parallel(self):
+        """Загружает таблицы в порядке графа зависимостей по внешним ключам."""
+        pending = {name: (method, set(deps)) for name, method, deps in LOADERS}
+        done = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while pending or running:
+                for name, (method, deps) in list(pending.items()):
+                    if deps <= done:
+                        del pending[name]
+                        future = pool.submit(
+                            closing_connection(getattr(self, method))
+                        )
+                        running[future] = name
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+                    done.add(running.pop(future))
+
+    def record(self, table, rows, started):
+        with self.stats_lock:
+            total_rows, seconds = self.stats.get(table, (0, 0))
+            self.stats[table] = (
+                total_rows + rows, seconds + time.monotonic() - started
+            )
+
+    def report(self):
+        """Выводит скорость загрузки по таблицам."""
+        self.stdout.write(
+            f"{'Файл':<20}{'строк':>10}{'сек':>10}{'строк/с':>12}"
+        )
+        for table, (rows, seconds) in self.stats.items():
+            speed = rows / seconds if seconds else 0
+            self.stdout.write(
+                f"{table:<20}{rows:>10}{seconds:>10.2f}{speed:>12.0f}"
+            )
+
+    def read_rows(self, filename):
+        """Лениво читает строки CSV-файла."""
+        with open(
+            os.path.join(self.path, filename), 'r', encoding='utf-8'
+        ) as file:
+            yield from csv.DictReader(file)
+
+    @staticmethod
+    def existing_ids(model):
+        """Множество первичных ключей таблицы для проверки внешних ключей."""
+        return set(model.objects.values_list('pk', flat=True))
+
+    def write_batch(self, model, objects, update_fields):
+        """
+        Записывает пачку объектов с учётом режима конфликтов.
+
+        Таблицы без обновляемых полей всегда пишутся в режиме ignore.
+        """
+        if self.conflicts == CONFLICT_IGNORE or not update_fields:
+            model.objects.bulk_create(objects, ignore_conflicts=True)
+            return
+        existing = set(
+            model.objects.filter(
+                pk__in=[obj.pk for obj in objects]
+            ).values_list('pk', flat=True)
+        )
+        model.objects.bulk_update(
+            [obj for obj in objects if obj.pk in existing], update_fields
+        )
+        model.objects.bulk_create(
+            [obj for obj in objects if obj.pk not in existing]
+        )
+
+    def load_rows(self, rows, model, build, update_fields):
+        """Записывает строки пачками в одной транзакции."""
+        loaded = skipped = 0
+        with self.write_lock, transaction.atomic():
+            for batch in batched(map(build, rows), self.batch_size):
+                valid = [obj for obj in batch if obj is not None]
+                skipped += len(batch) - len(valid)
+                if valid:
+                    self.write_batch(model, valid, update_fields)
+                loaded += len(valid)
+        return loaded, skipped
+
+    def load_chunks(self, filename, *args):
+        """
+        Загружает файл частями по chunk_size строк в пуле потоков.
+
+        В работе одновременно не больше workers частей, поэтому файл
+        целиком в память не читается.
+        """
+        loaded = skipped = 0
+        load_chunk = closing_connection(self.load_rows)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = set()
+            for chunk in batched(self.read_rows(filename), self.chunk_size):
+                if len(running) >= self.workers:
+                    finished, running = wait(
+                        running, return_when=FIRST_COMPLETED
+                    )
+                    for future in finished:
+                        chunk_loaded, chunk_skipped = future.result()
+                        loaded += chunk_loaded
+                        skipped += chunk_skipped
+                running.add(pool.submit(load_chunk, chunk, *args))
+            for future in running:
+                chunk_loaded, chunk_skipped = future.result()
+                loaded += chunk_loaded
+                skipped += chunk_skipped
+        return loaded, skipped
+
+    def load_table(self, filename, model, build, update_fields, message):
+        """
+        Потоково загружает CSV-файл в таблицу модели.
+
+        build превращает строку файла в объект модели или возвращает None,
+        если строка ссылается на отсутствующие записи. В однопоточном
+        режиме файл пишется одной транзакцией, в многопоточном - каждая
+        часть файла в своей.
+        """
+        started = time.monotonic()
+        if self.workers == 1:
+            loaded, skipped = self.load_rows(
+                self.read_rows(filename), model, build, update_fields
+            )
+        else:
+            loaded, skipped = self.load_chunks(
+                filename, model, build, update_fields
+            )
+        self.record(filename, loaded, started)
+        bulk_loaded.send(sender=model, using=DEFAULT_DB_ALIAS)
+        self.stdout.write(self.style.SUCCESS(
+            f"{message} Обработано строк: {loaded}."
+        ))
+        if skipped:
+            self.stdout.write(self.style.ERROR(
+                f"Пропущено строк с несуществующими связями: {skipped}."
+            ))
 
     def load_categories(self):
-        with open('static/data/category.csv', 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                Category.objects.get_or_create(
-                    id=row['id'],
-                    name=row['name'],
-                    slug=row['slug']
-                )
-        self.stdout.write(self.style.SUCCESS("Категории загружены!"))
+        self.load_table(
+            'category.csv',
+            Category,
+            lambda row: Category(
+                id=int(row['id']), name=row['name'], slug=row['slug']
+            ),
+            ('name', 'slug'),
+            "Категории загружены!",
+        )
 
     def load_genres(self):
-        with open('static/data/genre.csv', 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                Genre.objects.get_or_create(
-                    id=row['id'],
-                    name=row['name'],
-                    slug=row['slug']
-                )
-        self.stdout.write(self.style.SUCCESS("Жанры загружены!"))
+        self.load_table(
+            'genre.csv',
+            Genre,
+            lambda row: Genre(
+                id=int(row['id']), name=row['name'], slug=row['slug']
+            ),
+            ('name', 'slug'),
+            "Жанры загружены!",
+        )
 
     def load_users(self):
-        with open('static/data/users.csv', 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                User.objects.get_or_create(
-                    id=row['id'],
-                    username=row['username'],
-                    email=row['email'],
-                    role=row['role'],
-                    bio=row.get('bio', ''),
-                    first_name=row.get('first_name', ''),
-                    last_name=row.get('last_name', '')
-                )
-        self.stdout.write(self.style.SUCCESS("Пользователи загружены!"))
+        self.load_table(
+            'users.csv',
+            User,
+            lambda row: User(
+                id=int(row['id']),
+                username=row['username'],
+                email=row['email'],
+                role=row['role'],
+                bio=row.get('bio', ''),
+                first_name=row.get('first_name', ''),
+                last_name=row.get('last_name', '')
+            ),
+            ('username', 'email', 'role', 'bio', 'first_name', 'last_name'),
+            "Пользователи загружены!",
+        )
 
     def load_titles(self):
-        with open('static/data/titles.csv', 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                category = Category.objects.get(id=row['category'])
-                Title.objects.get_or_create(
-                    id=row['id'],
-                    name=row['name'],
-                    year=row['year'],
-                    category=category
-                )
-        self.stdout.write(self.style.SUCCESS("Произведения загружены!"))
+        category_ids = self.existing_ids(Category)
+
+        def build(row):
+            if int(row['category']) not in category_ids:
+                return None
+            return Title(
+                id=int(row['id']),
+                name=row['name'],
+                year=row['year'],
+                category_id=row['category']
+            )
+
+        self.load_table(
+            'titles.csv',
+            Title,
+            build,
+            ('name', 'year', 'category'),
+            "Произведения загружены!",
+        )
+        # Поисковый индекс, как и рейтинги, обновляется сигналами,
+        # которые bulk_create не отправляет.
+        with self.write_lock, transaction.atomic():
+            title_search().rebuild()
 
     def load_genre_titles(self):
-        with open(
-            'static/data/genre_title.csv', 'r', encoding='utf-8'
-        ) as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                try:
-                    title = Title.objects.get(id=row['title_id'])
-                    genre = Genre.objects.get(id=row['genre_id'])
-                    title.genre.add(genre)  # Добавляем жанр через ManyToMany
-                except Title.DoesNotExist:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f"Произведение с id {row['title_id']} не найдено."
-                        )
-                    )
-                except Genre.DoesNotExist:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f"Жанр с id {row['genre_id']} не найден."
-                        )
-                    )
-        self.stdout.write(
-            self.style.SUCCESS("Связи 'Жанры - Произведения' загружены!")
+        title_ids = self.existing_ids(Title)
+        genre_ids = self.existing_ids(Genre)
+        missing_titles = set()
+        missing_genres = set()
+
+        def build(row):
+            title_id = int(row['title_id'])
+            genre_id = int(row['genre_id'])
+            if title_id not in title_ids:
+                missing_titles.add(title_id)
+                return None
+            if genre_id not in genre_ids:
+                missing_genres.add(genre_id)
+                return None
+            return Title.genre.through(title_id=title_id, genre_id=genre_id)
+
+        # id связей из файла не переносятся: повторные пары отсекает
+        # уникальность (title_id, genre_id) через ignore_conflicts.
+        self.load_table(
+            'genre_title.csv',
+            Title.genre.through,
+            build,
+            None,
+            "Связи 'Жанры - Произведения' загружены!",
         )
+        if missing_titles:
+            self.stdout.write(self.style.ERROR(
+                "Не найдены произведения с id: "
+                + ', '.join(map(str, sorted(missing_titles)))
+            ))
+        if missing_genres:
+            self.stdout.write(self.style.ERROR(
+                "Не найдены жанры с id: "
+                + ', '.join(map(str, sorted(missing_genres)))
+            ))
 
     def load_reviews(self):
-        with open('static/data/review.csv', 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                title = Title.objects.get(id=row['title_id'])
-                author = User.objects.get(id=row['author'])
-                Review.objects.get_or_create(
-                    id=row['id'],
-                    title=title,
-                    text=row['text'],
-                    author=author,
-                    score=row['score'],
-                    pub_date=row['pub_date']
-                )
-        self.stdout.write(self.style.SUCCESS("Отзывы загружены!"))
+        title_ids = self.existing_ids(Title)
+        user_ids = self.existing_ids(User)
+
+        def build(row):
+            if (
+                int(row['title_id']) not in title_ids
+                or int(row['author']) not in user_ids
+            ):
+                return None
+            return Review(
+                id=int(row['id']),
+                title_id=row['title_id'],
+                text=row['text'],
+                author_id=row['author'],
+                score=row['score'],
+                pub_date=row['pub_date']
+            )
+
+        self.load_table(
+            'review.csv',
+            Review,
+            build,
+            ('title', 'text', 'author', 'score'),
+            "Отзывы загружены!",
+        )
+        # bulk_create не отправляет сигналы, поэтому рейтинги
+        # пересчитываются одним запросом после загрузки.
+        with self.write_lock, transaction.atomic():
+            Title.objects.rebuild_ratings()
 
     def load_comments(self):
-        with open('static/data/comments.csv', 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                review = Review.objects.get(id=row['review_id'])
-                author = User.objects.get(id=row['author'])
-                Comment.objects.get_or_create(
-                    id=row['id'],
-                    review=review,
-                    text=row['text'],
-                    author=author,
-                    pub_date=row['pub_date']
-                )
-        self.stdout.write(self.style.SUCCESS("Комментарии загружены!"))
+        review_ids = self.existing_ids(Review)
+        user_ids = self.existing_ids(User)
+
+        def build(row):
+            if (
+                int(row['review_id']) not in review_ids
+                or int(row['author']) not in user_ids
+            ):
+                return None
+            return Comment(
+                id=int(row['id']),
+                review_id=row['review_id'],
+                text=row['text'],
+                author_id=row['author'],
+                pub_date=row['pub_date']
+            )
+
+        self.load_table(
+            'comments.csv',
+            Comment,
+            build,
+            ('review', 'text', 'author'),
+            "Комментарии загружены!",
+        )
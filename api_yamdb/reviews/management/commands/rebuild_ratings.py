@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = "Пересчёт рейтингов произведений по таблице отзывов"
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            updated = Title.objects.rebuild_ratings()
+        self.stdout.write(self.style.SUCCESS(
+            f"Рейтинги пересчитаны: {updated} произведений."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.search import title_search
+
+
+class Command(BaseCommand):
+    help = "Перестроение поискового индекса произведений"
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            title_search().rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            "Поисковый индекс произведений перестроен."
+        ))
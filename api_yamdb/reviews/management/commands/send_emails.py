@@ -0,0 +1,95 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from reviews.mailing import claim_pending, deliver, metrics, purge_finished
+
+# Как часто простаивающий обработчик удаляет старые письма, в секундах.
+PURGE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Отправка писем из очереди"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество потоков отправки.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Количество писем, забираемых из очереди за раз.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить накопившиеся письма и завершить работу.',
+        )
+
+    def handle(self, *args, **options):
+        metrics.reset()
+        purge_finished()
+        try:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                sent = sum(pool.map(
+                    lambda idx: self.work(options, purges=idx == 0),
+                    range(options['workers'])
+                ))
+            self.stdout.write(
+                self.style.SUCCESS(f"Отправлено писем: {sent}.")
+            )
+        finally:
+            self.report()
+
+    def report(self):
+        """Выводит счётчики и скорость отправки."""
+        stats = metrics.snapshot()
+        self.stdout.write(
+            f"Отправлено: {stats['sent']}, ошибок: {stats['failed']}, "
+            f"пачек: {stats['batches']}, соединений: {stats['connections']}, "
+            f"{stats['per_second']:.1f} писем/с за "
+            f"{stats['elapsed']:.1f} с."
+        )
+
+    def work(self, options, purges=False):
+        """
+        Цикл обработчика: пачка за пачкой, пока очередь не опустеет.
+
+        Соединение с почтовым сервером держится открытым, пока есть
+        письма, и закрывается на время простоя, чтобы сервер не
+        разорвал его по таймауту. Старые письма удаляются при запуске,
+        а затем в простое только первым потоком (purges), чтобы потоки
+        не удаляли одни и те же строки одновременно.
+        """
+        sent = 0
+        purged_at = time.monotonic()
+        mail_connection = get_connection()
+        try:
+            while True:
+                emails = claim_pending(options['batch_size'])
+                if emails:
+                    sent += deliver(emails, mail_connection)
+                    continue
+                mail_connection.close()
+                if options['once']:
+                    return sent
+                if purges and time.monotonic() - purged_at > PURGE_INTERVAL:
+                    purge_finished()
+                    purged_at = time.monotonic()
+                time.sleep(options['interval'])
+        finally:
+            mail_connection.close()
+            connection.close()
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+# SQL миграции не зависит от reviews.search: схема индекса фиксируется
+# здесь, а её дальнейшие изменения вносят следующие миграции.
+SQLITE_CREATE = (
+    # unicode61 приводит к нижнему регистру и кириллицу.
+    "CREATE VIRTUAL TABLE reviews_title_search USING fts5("
+    "name, description, tokenize='unicode61 remove_diacritics 2')",
+    'INSERT INTO reviews_title_search (rowid, name, description) '
+    'SELECT id, name, description FROM reviews_title',
+)
+POSTGRES_CREATE = (
+    'CREATE TABLE reviews_title_search ('
+    'title_id integer PRIMARY KEY REFERENCES reviews_title (id) '
+    'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+    'document tsvector NOT NULL)',
+    'CREATE INDEX reviews_title_search_document_idx ON reviews_title_search '
+    'USING GIN (document)',
+    'INSERT INTO reviews_title_search (title_id, document) '
+    "SELECT id, setweight(to_tsvector('simple', name), 'A') || "
+    "setweight(to_tsvector('simple', description), 'B') FROM reviews_title",
+)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        statements = POSTGRES_CREATE
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                return
+        statements = SQLITE_CREATE
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    schema_editor.execute('DROP TABLE IF EXISTS reviews_title_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
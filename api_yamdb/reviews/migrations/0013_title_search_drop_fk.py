@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def drop_title_fk(apps, schema_editor):
+    # Внешний ключ на reviews_title не давал flush выполнить TRUNCATE:
+    # таблица индекса моделям Django неизвестна.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE reviews_title_search '
+        'DROP CONSTRAINT IF EXISTS reviews_title_search_title_id_fkey'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_outgoingemail_claimed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_title_fk, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def widen_title_id(apps, schema_editor):
+    # id произведений - bigint (BigAutoField). В SQLite rowid и так
+    # 64-битный.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE reviews_title_search ALTER COLUMN title_id TYPE bigint'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_title_search_drop_fk'),
+    ]
+
+    operations = [
+        migrations.RunPython(widen_title_id, migrations.RunPython.noop),
+    ]
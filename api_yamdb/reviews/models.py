@@ -1,6 +1,9 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from .constants import (
     MAX_SCORE,
@@ -13,7 +16,11 @@ from .constants import (
     MAX_NAME_LENGTH,
     EMAIL_LENGTH,
     CHAR_OUTPUT_LIMIT,
-    MAX_SLUG_LENGTH
+    MAX_SLUG_LENGTH,
+    EMAIL_PENDING,
+    EMAIL_STATUS_CHOICES,
+    SUBJECT_LENGTH,
+    WORKER_ID_LENGTH
 )
 from .validators import validate_year, username_validator
 
@@ -46,6 +53,15 @@ class User(AbstractUser):
         verbose_name='Никнейм'
     )
 
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия токенов',
+    )
+
+    # Поля, изменение которых отзывает выданные токены доступа.
+    ACCESS_FIELDS = ('role', 'is_staff', 'is_active')
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
@@ -54,6 +70,26 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_access = instance.access_state()
+        return instance
+
+    def access_state(self):
+        return tuple(self.__dict__.get(field) for field in self.ACCESS_FIELDS)
+
+    def save(self, *args, **kwargs):
+        """При смене роли или статуса повышает версию токенов."""
+        loaded = getattr(self, '_loaded_access', None)
+        if loaded is not None and loaded != self.access_state():
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_access = self.access_state()
+
     def is_user(self):
         return self.role == USER
 
@@ -101,6 +137,26 @@ class Genre(NameSlugModel):
         verbose_name_plural = 'Жанры'
 
 
+class TitleQuerySet(models.QuerySet):
+    """Набор запросов произведений."""
+
+    def rebuild_ratings(self):
+        """Пересчитывает сумму и количество оценок по таблице отзывов."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+        )
+
+
 class Title(models.Model):
     """Модель произведений."""
 
@@ -120,18 +176,51 @@ class Title(models.Model):
     category = models.ForeignKey(
         Category,
         on_delete=models.CASCADE,
+        # Покрывается индексом title_category_year_name_idx.
+        db_index=False,
         verbose_name='Категория',
     )
     genre = models.ManyToManyField(
         Genre,
         verbose_name='Жанр',
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок',
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок',
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('-year', 'name')
         default_related_name = 'titles'
+        indexes = (
+            # Порядок списка произведений и фильтр по году.
+            models.Index(
+                fields=('-year', 'name'),
+                name='title_year_name_idx'
+            ),
+            # Фильтр по категории с тем же порядком.
+            models.Index(
+                fields=('category', '-year', 'name'),
+                name='title_category_year_name_idx'
+            ),
+        )
+
+    @property
+    def rating(self):
+        """Средняя оценка произведения или None, если отзывов нет."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum // self.rating_count
 
 
 class TextAuthorDateModel(models.Model):
@@ -160,7 +249,8 @@ class Review(TextAuthorDateModel):
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
-        db_index=True,
+        # Покрывается индексом review_title_pub_date_idx.
+        db_index=False,
         verbose_name='Произведние'
     )
     score = models.PositiveSmallIntegerField(
@@ -180,6 +270,25 @@ class Review(TextAuthorDateModel):
                 name='unique_author_title'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженную оценку, чтобы при изменении отзыва
+        # скорректировать рейтинг произведения на разницу.
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и рейтинг произведения в одной транзакции."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class Comment(TextAuthorDateModel):
@@ -188,9 +297,86 @@ class Comment(TextAuthorDateModel):
     review = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
+        # Покрывается индексом comment_review_pub_date_idx.
+        db_index=False,
         verbose_name='Отзыв',
     )
 
     class Meta(TextAuthorDateModel.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        )
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    subject = models.CharField(
+        max_length=SUBJECT_LENGTH,
+        verbose_name='Тема'
+    )
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(
+        max_length=EMAIL_LENGTH,
+        verbose_name='Отправитель'
+    )
+    recipient = models.EmailField(
+        max_length=EMAIL_LENGTH,
+        verbose_name='Получатель'
+    )
+    status = models.CharField(
+        max_length=max(len(status) for status, _ in EMAIL_STATUS_CHOICES),
+        choices=EMAIL_STATUS_CHOICES,
+        default=EMAIL_PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки отправки'
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка'
+    )
+    worker = models.CharField(
+        max_length=WORKER_ID_LENGTH,
+        blank=True,
+        verbose_name='Обработчик'
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взято в работу'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата добавления'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt_at',)
+        indexes = (
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='email_status_next_attempt_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject[:CHAR_OUTPUT_LIMIT]}'
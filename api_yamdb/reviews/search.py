@@ -0,0 +1,208 @@
+import re
+from functools import lru_cache
+
+from django.db import connection
+
+TABLE = 'reviews_title_search'
+PRUNE_BATCH_SIZE = 500
+
+
+def search_terms(query):
+    """Слова поискового запроса в нижнем регистре."""
+    return re.findall(r'\w+', query.lower())
+
+
+def ranked(queryset, join, match, params, rank, rank_params=()):
+    """
+    Присоединяет к queryset таблицу индекса и её оценку релевантности.
+
+    Оценка считается за один проход по найденным записям индекса:
+    коррелированный подзапрос на каждое произведение в FTS5 заново
+    выполняет поиск и на частых словах работает секунды.
+    """
+    return queryset.extra(
+        tables=(TABLE,),
+        where=(join, match),
+        params=params,
+        select={'search_rank': rank},
+        select_params=rank_params,
+    )
+
+
+class TitleSearch:
+    """
+    Полнотекстовый поиск произведений по названию и описанию.
+
+    Базовая реализация не требует отдельного индекса и ищет подстроку
+    без учёта регистра. Реализации для конкретных СУБД хранят
+    поисковый индекс в таблице TABLE и поддерживают его сигналами.
+
+    Таблица индекса создаётся миграциями и моделям Django неизвестна:
+    flush её не очищает, поэтому после него записи удалённых
+    произведений убирает prune().
+    """
+
+    def __init__(self, db_connection=connection):
+        self.connection = db_connection
+
+    def index(self, titles):
+        """Добавляет или обновляет произведения в индексе."""
+
+    def remove(self, pks):
+        """Удаляет произведения из индекса."""
+
+    def rebuild(self):
+        """Заново строит индекс по таблице произведений."""
+
+    def prune(self, pks=None):
+        """
+        Удаляет из индекса произведения, которых нет в таблице.
+
+        С pks проверяются только эти произведения.
+        """
+
+    def search(self, queryset, query):
+        """Произведения queryset, подходящие под запрос, лучшие первыми."""
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        for term in terms:
+            queryset = queryset.filter(name__icontains=term)
+        return queryset
+
+
+class SQLiteTitleSearch(TitleSearch):
+    """Поиск на SQLite FTS5 с ранжированием bm25."""
+
+    def index(self, titles):
+        titles = list(titles)
+        self.remove([title.pk for title in titles])
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (rowid, name, description) '
+                'VALUES (%s, %s, %s)',
+                [(title.pk, title.name, title.description) for title in titles]
+            )
+
+    def remove(self, pks):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {TABLE} WHERE rowid = %s', [(pk,) for pk in pks]
+            )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+            cursor.execute(
+                f'INSERT INTO {TABLE} (rowid, name, description) '
+                'SELECT id, name, description FROM reviews_title'
+            )
+
+    def prune(self, pks=None):
+        orphan = 'rowid NOT IN (SELECT id FROM reviews_title)'
+        with self.connection.cursor() as cursor:
+            if pks is None:
+                cursor.execute(f'DELETE FROM {TABLE} WHERE {orphan}')
+                return
+            pks = list(pks)
+            # Пачки укладываются в лимит параметров запроса SQLite.
+            for start in range(0, len(pks), PRUNE_BATCH_SIZE):
+                batch = pks[start:start + PRUNE_BATCH_SIZE]
+                cursor.execute(
+                    f'DELETE FROM {TABLE} WHERE rowid IN '
+                    f'({", ".join(["%s"] * len(batch))}) AND {orphan}',
+                    batch
+                )
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        # Каждое слово ищется как префикс, все слова обязательны.
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return ranked(
+            queryset,
+            f'{TABLE}.rowid = reviews_title.id',
+            f'{TABLE} MATCH %s',
+            (match,),
+            # Совпадение в названии весит больше, чем в описании.
+            f'bm25({TABLE}, 10.0, 1.0)',
+        ).order_by('search_rank', 'pk')
+
+
+class PostgresTitleSearch(TitleSearch):
+    """Поиск на tsvector с GIN-индексом и ранжированием ts_rank."""
+
+    DOCUMENT = (
+        "setweight(to_tsvector('simple', name), 'A') || "
+        "setweight(to_tsvector('simple', description), 'B')"
+    )
+
+    def upsert(self, where='', params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {TABLE} (title_id, document) '
+                f'SELECT id, {self.DOCUMENT} FROM reviews_title {where} '
+                'ON CONFLICT (title_id) '
+                'DO UPDATE SET document = EXCLUDED.document',
+                params
+            )
+
+    def index(self, titles):
+        self.upsert('WHERE id = ANY(%s)', ([title.pk for title in titles],))
+
+    def remove(self, pks):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE title_id = ANY(%s)', (list(pks),)
+            )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {TABLE}')
+        self.upsert()
+
+    def prune(self, pks=None):
+        where = 'NOT EXISTS (SELECT 1 FROM reviews_title WHERE id = title_id)'
+        params = ()
+        if pks is not None:
+            where += ' AND title_id = ANY(%s)'
+            params = (list(pks),)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE {where}', params)
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return ranked(
+            queryset,
+            f'{TABLE}.title_id = reviews_title.id',
+            f"{TABLE}.document @@ to_tsquery('simple', %s)",
+            (tsquery,),
+            f"ts_rank({TABLE}.document, to_tsquery('simple', %s))",
+            (tsquery,),
+        ).order_by('-search_rank', 'pk')
+
+
+def fts5_available(cursor):
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    return bool(cursor.fetchone()[0])
+
+
+def get_title_search(db_connection=connection):
+    """Реализация поиска для СУБД соединения."""
+    if db_connection.vendor == 'postgresql':
+        return PostgresTitleSearch(db_connection)
+    if db_connection.vendor == 'sqlite':
+        with db_connection.cursor() as cursor:
+            if fts5_available(cursor):
+                return SQLiteTitleSearch(db_connection)
+    return TitleSearch(db_connection)
+
+
+@lru_cache(maxsize=None)
+def title_search():
+    """Реализация поиска для базы данных по умолчанию."""
+    return get_title_search()
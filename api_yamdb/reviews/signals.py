@@ -0,0 +1,106 @@
+import threading
+
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Review, Title
+from .search import TABLE, get_title_search, title_search
+
+# Отправляется с sender=model после массовой загрузки таблицы модели:
+# bulk_create и bulk_update не отправляют post_save.
+bulk_loaded = Signal()
+
+
+@receiver(post_save, sender=Review)
+def add_review_score(sender, instance, created, **kwargs):
+    """Учитывает новую или изменённую оценку в рейтинге произведения."""
+    if created:
+        Title.objects.filter(pk=instance.title_id).update(
+            rating_sum=F('rating_sum') + instance.score,
+            rating_count=F('rating_count') + 1,
+        )
+    else:
+        loaded_score = getattr(instance, '_loaded_score', None)
+        if loaded_score is None:
+            Title.objects.filter(pk=instance.title_id).rebuild_ratings()
+        elif loaded_score != instance.score:
+            Title.objects.filter(pk=instance.title_id).update(
+                rating_sum=F('rating_sum') + instance.score - loaded_score,
+            )
+    instance._loaded_score = instance.score
+
+
+# id, обработка которых отложена до фиксации транзакции, отдельно
+# для каждого потока.
+pending = threading.local()
+
+
+def on_commit_batch(kind, pk, handler, using):
+    """
+    Копит pk до фиксации транзакции и передаёт их handler одним вызовом.
+
+    Каскадное удаление отправляет сигнал на каждый объект, а так
+    зависимые данные обновляются одним запросом. Если транзакция
+    откатится, накопленные pk уйдут в handler со следующей фиксацией,
+    поэтому handler должен быть безопасен для существующих объектов.
+    """
+    pending.__dict__.setdefault(kind, set()).add(pk)
+
+    def flush():
+        pks = pending.__dict__.pop(kind, None)
+        if pks:
+            handler(pks, using)
+
+    transaction.on_commit(flush, using=using)
+
+
+def rebuild_ratings(pks, using):
+    Title.objects.using(using).filter(pk__in=pks).rebuild_ratings()
+
+
+def prune_titles(pks, using):
+    get_title_search(connections[using]).prune(pks)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_score(sender, instance, using, **kwargs):
+    """
+    Пересчитывает рейтинг произведения удалённого отзыва после фиксации.
+
+    Произведения, удалённые вместе с отзывами, не обновляются вовсе.
+    """
+    on_commit_batch('ratings', instance.title_id, rebuild_ratings, using)
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, **kwargs):
+    """Обновляет произведение в поисковом индексе."""
+    title_search().index((instance,))
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, using, **kwargs):
+    """
+    Удаляет произведение из поискового индекса после фиксации.
+
+    Удаляются только записи произведений, которых уже нет в таблице.
+    """
+    on_commit_batch('unindex', instance.pk, prune_titles, using)
+
+
+@receiver(post_migrate)
+def prune_search_index(sender, using, **kwargs):
+    """
+    Убирает из поискового индекса удалённые произведения.
+
+    post_migrate отправляется и после flush, который таблицу индекса
+    не очищает: иначе её записи достались бы новым произведениям с
+    теми же id.
+    """
+    if sender.label != 'reviews':
+        return
+    db_connection = connections[using]
+    if TABLE in db_connection.introspection.table_names():
+        get_title_search(db_connection).prune()
@@ -0,0 +1,210 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_version
+from api.checks import check_shared_cache
+from reviews.models import Category, Genre, Title
+from tests.utils import (
+    create_categories, create_genre, create_single_review, create_titles
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08CatalogueCache:
+
+    CATEGORY_URL = '/api/v1/categories/'
+    GENRE_URL = '/api/v1/genres/'
+
+    @pytest.mark.parametrize('url,create', (
+        (CATEGORY_URL, create_categories),
+        (GENRE_URL, create_genre),
+    ))
+    def test_01_list_served_from_cache(self, client, admin_client, url,
+                                       create):
+        create(admin_client)
+        first = client.get(url)
+        assert first.status_code == HTTPStatus.OK
+
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get(url)
+        assert second.status_code == HTTPStatus.OK
+        assert second.json() == first.json(), (
+            f'Проверьте, что повторный GET-запрос к `{url}` возвращает '
+            'те же данные.'
+        )
+        assert not queries.captured_queries, (
+            f'Проверьте, что повторный GET-запрос к `{url}` обслуживается '
+            'из кэша без запросов к базе данных.'
+        )
+
+    @pytest.mark.parametrize('url,create', (
+        (CATEGORY_URL, create_categories),
+        (GENRE_URL, create_genre),
+    ))
+    def test_02_cache_invalidated_on_change(self, client, admin_client, url,
+                                            create):
+        objects = create(admin_client)
+        count = client.get(url).json()['count']
+
+        response = admin_client.post(
+            url, data={'name': 'Новый', 'slug': 'new-slug'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert client.get(url).json()['count'] == count + 1, (
+            f'Проверьте, что после создания объекта список `{url}` '
+            'обновляется.'
+        )
+
+        response = admin_client.delete(f'{url}{objects[0]["slug"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert client.get(url).json()['count'] == count, (
+            f'Проверьте, что после удаления объекта список `{url}` '
+            'обновляется.'
+        )
+
+    def test_03_cache_keyed_by_search_and_page(self, client, admin_client):
+        create_genre(admin_client)
+        full = client.get(self.GENRE_URL).json()
+        searched = client.get(
+            self.GENRE_URL, {'search': full['results'][0]['name']}
+        ).json()
+        assert searched['count'] == 1
+        assert client.get(self.GENRE_URL).json() == full
+
+    def test_04_cache_invalidated_after_commit(self, client):
+        version = get_version('category')
+        with transaction.atomic():
+            Category.objects.create(name='Новая', slug='new')
+            assert get_version('category') == version, (
+                'Проверьте, что версия кэша категорий меняется только '
+                'после фиксации транзакции.'
+            )
+        assert get_version('category') != version
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def test_01_title_detail_cached_with_etag(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        first = client.get(url)
+        assert first['X-Cache'] == 'MISS'
+
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get(url)
+        assert second['X-Cache'] == 'HIT'
+        assert not queries.captured_queries, (
+            'Проверьте, что повторный GET-запрос к странице произведения '
+            'обслуживается из кэша без запросов к базе данных.'
+        )
+        assert second.json() == first.json()
+        assert second['ETag'] == first['ETag']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что при совпадении заголовка `If-None-Match` с '
+            '`ETag` возвращается ответ со статусом 304.'
+        )
+        response = client.get(self.TITLES_URL)
+        assert client.get(
+            self.TITLES_URL, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_02_title_cache_invalidation(self, client, admin_client,
+                                         user_client):
+        titles, _, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        client.get(url)
+        client.get(self.TITLES_URL)
+
+        create_single_review(user_client, title_id, 'Текст', 7)
+        assert client.get(url).json()['rating'] == 7, (
+            'Проверьте, что после добавления отзыва кэш произведения '
+            'сбрасывается и рейтинг обновляется.'
+        )
+
+        admin_client.patch(url, data={'genre': [genres[2]['slug']]})
+        assert [
+            genre['slug'] for genre in client.get(url).json()['genre']
+        ] == [genres[2]['slug']]
+
+        genre = Genre.objects.get(slug=genres[2]['slug'])
+        genre.name = 'Боевик'
+        genre.save()
+        assert client.get(url).json()['genre'][0]['name'] == 'Боевик'
+        listed = {
+            title['id']: title for title in
+            client.get(self.TITLES_URL).json()['results']
+        }
+        assert listed[title_id]['genre'][0]['name'] == 'Боевик', (
+            'Проверьте, что изменение жанра сбрасывает кэш связанных '
+            'произведений в списке.'
+        )
+
+        Category.objects.filter(
+            slug=titles[0]['category']
+        ).get().delete()
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_title_cache_invalidated_after_commit(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        version = get_version(f'title:{title.pk}')
+        with transaction.atomic():
+            title.name = 'Новое название'
+            title.save()
+            assert get_version(f'title:{title.pk}') == version, (
+                'Проверьте, что версия кэша произведения меняется только '
+                'после фиксации транзакции.'
+            )
+        assert get_version(f'title:{title.pk}') != version
+
+
+    def test_04_cache_stats_exposed(self, client, admin_client):
+        create_titles(admin_client)
+        assert client.get(self.TITLES_URL)['X-Cache'] == 'MISS'
+        response = client.get(self.TITLES_URL)
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что список произведений сообщает в заголовке '
+            '`X-Cache`, взят ли он из кэша.'
+        )
+        count = len(response.json()['results'])
+
+        out = StringIO()
+        call_command('cache_stats', '--reset', stdout=out)
+        assert f'Попаданий: {count}, промахов: {count}' in out.getvalue(), (
+            'Проверьте, что команда `cache_stats` выводит счётчики '
+            'попаданий и промахов кэша произведений.'
+        )
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+        assert 'Попаданий: 0, промахов: 0' in out.getvalue()
+
+class Test08SharedCacheCheck:
+
+    def test_01_process_local_cache_rejected(self, settings, tmp_path):
+        settings.DEBUG = False
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }}
+        assert [error.id for error in check_shared_cache(None)] == [
+            'api.E001'
+        ], (
+            'Проверьте, что без DEBUG кэш в памяти процесса не проходит '
+            'системную проверку.'
+        )
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+        assert check_shared_cache(None) == []
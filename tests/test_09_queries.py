@@ -0,0 +1,380 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.tokens import RoleAccessToken
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+def create_catalogue(size):
+    category = Category.objects.create(
+        name='Фильм', slug=f'films-{Category.objects.count()}'
+    )
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{size}-{idx}')
+        for idx in range(3)
+    ]
+    titles = []
+    for idx in range(size):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        title.genre.set(genres)
+        titles.append(title)
+    return titles
+
+
+def count_queries(client, url):
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def test_01_title_list_queries_do_not_grow(self, client):
+        create_catalogue(1)
+        single_title = count_queries(client, self.TITLES_URL)
+        create_catalogue(4)
+        full_page = count_queries(client, self.TITLES_URL)
+        assert single_title == full_page, (
+            'Проверьте, что количество запросов к базе данных при '
+            f'GET-запросе к `{self.TITLES_URL}` не зависит от числа '
+            f'произведений на странице: {single_title} запросов для одного '
+            f'произведения и {full_page} для полной страницы.'
+        )
+        assert full_page <= 3
+
+    def test_02_title_detail_queries(self, client):
+        title = create_catalogue(1)[0]
+        url = self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title.pk)
+        assert count_queries(client, url) <= 2, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет не больше двух '
+            'запросов к базе данных.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09ReviewCreateQueries:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_review_create_queries(self, user_client):
+        title = create_catalogue(1)[0]
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        title_selects = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_title"' in query['sql']
+        ]
+        review_selects = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ]
+        assert len(title_selects) == 1, (
+            f'Проверьте, что при POST-запросе к `{url}` произведение '
+            'загружается из базы данных один раз.'
+        )
+        assert not review_selects, (
+            f'Проверьте, что при POST-запросе к `{url}` повторный отзыв '
+            'определяется ограничением уникальности, без отдельного запроса.'
+        )
+
+        response = user_client.post(url, data={'text': 'Ещё', 'score': 6})
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CommentParentQueries:
+
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def test_01_comment_parent_resolved_once(self, user, user_client):
+        first, second = create_catalogue(2)
+        review = Review.objects.create(
+            title=first, author=user, text='Отзыв', score=5
+        )
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=first.pk, review_id=review.pk
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.post(url, data={'text': 'Комментарий'})
+        assert response.status_code == 201
+        parent_selects = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ]
+        assert len(parent_selects) == 1, (
+            f'Проверьте, что при POST-запросе к `{url}` отзыв загружается '
+            'из базы данных одним запросом.'
+        )
+
+        foreign_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=second.pk, review_id=review.pk
+        )
+        assert user_client.get(foreign_url).status_code == 404, (
+            'Проверьте, что запрос к комментариям отзыва, не относящегося '
+            'к произведению из URL, возвращает ответ со статусом 404.'
+        )
+        assert user_client.post(
+            foreign_url, data={'text': 'Комментарий'}
+        ).status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09AuthenticationQueries:
+
+    PROFILE_URL = '/api/v1/users/me/'
+    USERS_URL = '/api/v1/users/'
+
+    def test_01_authenticated_user_cached(self, user_client):
+        assert user_client.get(self.PROFILE_URL).status_code == 200
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.get(self.PROFILE_URL)
+        assert response.status_code == 200
+        assert not queries.captured_queries, (
+            'Проверьте, что при повторном запросе с тем же токеном '
+            'пользователь не загружается из базы данных.'
+        )
+
+    def test_02_role_change_revokes_tokens(self, admin_client, user,
+                                           user_client):
+        assert user_client.get(self.USERS_URL).status_code == 403
+        response = admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert user_client.get(self.USERS_URL).status_code == 401, (
+            'Проверьте, что после изменения роли пользователя выданные '
+            'ему токены перестают приниматься.'
+        )
+
+        user.refresh_from_db()
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+        )
+        assert client.get(self.USERS_URL).status_code == 200
+
+        user.delete()
+        assert client.get(self.PROFILE_URL).status_code == 401, (
+            'Проверьте, что токен удалённого пользователя не принимается.'
+        )
+
+    def test_03_permissions_trust_token_claims(self, admin):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(admin)}'
+        )
+        assert client.get(self.USERS_URL).status_code == 200
+        cache.delete(f'user:{admin.pk}')
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'{self.USERS_URL}{admin.username}/')
+        assert response.status_code == 200
+        assert len(queries.captured_queries) == 1, (
+            'Проверьте, что при действующей версии токена пользователь '
+            'собирается из утверждений токена без запроса к базе данных.'
+        )
+
+    def test_04_profile_keeps_password(self, user, user_client):
+        assert user_client.get(self.PROFILE_URL).status_code == 200
+        assert 'password' not in cache.get(f'user:{user.pk}'), (
+            'Проверьте, что пароль пользователя не хранится в кэше.'
+        )
+        User.objects.filter(pk=user.pk).update(password='changed')
+        response = user_client.patch(
+            self.PROFILE_URL, data={'bio': 'Новая биография'}
+        )
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.bio == 'Новая биография'
+        assert user.password == 'changed', (
+            'Проверьте, что изменение профиля не перезаписывает поля '
+            'пользователя значениями из кэша.'
+        )
+
+    def test_05_user_forgotten_after_commit(self, user, user_client):
+        assert user_client.get(self.PROFILE_URL).status_code == 200
+        with transaction.atomic():
+            user.role = 'moderator'
+            user.save()
+            assert cache.get(f'user:{user.pk}') is not None, (
+                'Проверьте, что пользователь удаляется из кэша только '
+                'после фиксации транзакции.'
+            )
+        assert cache.get(f'user:{user.pk}') is None
+
+
+    def test_06_profile_from_claims_loaded_once(self, admin):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(admin)}'
+        )
+        assert client.get(self.PROFILE_URL).status_code == 200
+        cache.delete(f'user:{admin.pk}')
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.PROFILE_URL)
+        assert response.status_code == 200
+        assert response.json()['email'] == admin.email
+        assert len(queries.captured_queries) == 1, (
+            'Проверьте, что поля профиля пользователя, собранного из '
+            'утверждений токена, дочитываются одним запросом.'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            client.get(self.PROFILE_URL)
+        assert not queries.captured_queries, (
+            'Проверьте, что дочитанный профиль сохраняется в кэше.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09SignUpQueries:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def user_queries(self, client, data, status):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == status
+        return [
+            query['sql'] for query in queries.captured_queries
+            if 'reviews_user' in query['sql']
+        ]
+
+    def test_01_signup_queries(self, client, settings):
+        settings.EMAIL_QUEUE_EAGER = False
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        queries = self.user_queries(client, data, 200)
+        assert len(queries) == 2, (
+            'Проверьте, что регистрация нового пользователя выполняет '
+            'один поиск и одну вставку в таблицу пользователей.\n'
+            + '\n'.join(queries)
+        )
+        queries = self.user_queries(client, data, 200)
+        assert len(queries) == 1, (
+            'Проверьте, что повторная регистрация выполняет один запрос к '
+            'таблице пользователей.\n' + '\n'.join(queries)
+        )
+        for conflict, field in (
+            ({'username': 'new_user', 'email': 'other@yamdb.fake'},
+             'username'),
+            ({'username': 'other', 'email': 'new_user@yamdb.fake'}, 'email'),
+        ):
+            with CaptureQueriesContext(connection) as captured:
+                response = client.post(self.URL_SIGNUP, data=conflict)
+            assert response.status_code == 400
+            assert field in response.json()
+            assert len(captured.captured_queries) == 1, (
+                'Проверьте, что конфликт username или email определяется '
+                'одним запросом к базе данных.'
+            )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleWriteQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_genre_slugs_resolved_in_memory(self, admin_client):
+        create_catalogue(1)
+        data = {
+            'name': 'Новое произведение',
+            'year': 2000,
+            'category': Category.objects.first().slug,
+            'genre': list(Genre.objects.values_list('slug', flat=True)),
+        }
+        # Первый запрос заполняет реестр категорий и жанров.
+        assert admin_client.post(self.TITLES_URL, data=data).status_code == 201
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == 201
+        slug_selects = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and '"slug" =' in query['sql']
+        ]
+        assert not slug_selects, (
+            'Проверьте, что при создании произведения slug жанров и '
+            'категории не ищутся в базе данных по одному.\n'
+            + '\n'.join(slug_selects)
+        )
+
+    def test_02_registry_follows_catalogue_changes(self, admin_client):
+        create_catalogue(1)
+        category = Category.objects.first()
+        data = {
+            'name': 'Новое произведение',
+            'year': 2000,
+            'category': category.slug,
+            'genre': list(Genre.objects.values_list('slug', flat=True)),
+        }
+        assert admin_client.post(self.TITLES_URL, data=data).status_code == 201
+        category.slug = 'renamed'
+        category.save()
+        assert admin_client.post(self.TITLES_URL, data=data).status_code == 400
+        data['category'] = 'renamed'
+        assert admin_client.post(self.TITLES_URL, data=data).status_code == 201
+
+    def delete_queries(self, admin_client, django_user_model, reviews):
+        title = create_catalogue(reviews)[0]
+        for idx in range(reviews):
+            author = django_user_model.objects.create_user(
+                username=f'author{title.pk}-{idx}',
+                email=f'author{title.pk}-{idx}@yamdb.fake'
+            )
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+            Comment.objects.create(review=review, author=author, text='Да')
+        # Первый запрос заполняет кэш пользователя.
+        admin_client.get(f'{self.TITLES_URL}{title.pk}/')
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.delete(f'{self.TITLES_URL}{title.pk}/')
+        assert response.status_code == 204
+        return len(queries.captured_queries)
+
+    def test_03_title_delete_queries_do_not_grow(self, admin_client,
+                                                 django_user_model):
+        single = self.delete_queries(admin_client, django_user_model, 1)
+        many = self.delete_queries(admin_client, django_user_model, 6)
+        assert single == many, (
+            'Проверьте, что удаление произведения не обновляет рейтинг '
+            f'на каждый удаляемый отзыв: {single} запросов для одного '
+            f'отзыва и {many} для шести.'
+        )
+
+    def test_04_user_delete_rebuilds_ratings_once(self, admin_client,
+                                                  django_user_model):
+        author = django_user_model.objects.create_user(
+            username='author', email='author@yamdb.fake'
+        )
+        titles = create_catalogue(3)
+        for title in titles:
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        with CaptureQueriesContext(connection) as queries:
+            author.delete()
+        rating_updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ]
+        assert len(rating_updates) == 1, (
+            'Проверьте, что при удалении пользователя рейтинги его '
+            'произведений пересчитываются одним запросом.'
+        )
+        assert not Title.objects.filter(rating_count__gt=0).exists()
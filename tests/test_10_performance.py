@@ -0,0 +1,314 @@
+import os
+import random
+import statistics
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.urls import v1_router
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.search import title_search
+
+# Размер набора данных и допуски задаются окружением, чтобы на
+# стенде гонять тот же набор тестов на больших объёмах. Время ответа
+# зависит от машины, поэтому проверяется только с PERF_LATENCY=1;
+# бюджеты запросов к БД проверяются всегда.
+SCALE = int(os.getenv('PERF_SCALE', 1))
+CHECK_LATENCY = os.getenv('PERF_LATENCY') == '1'
+LATENCY_FACTOR = float(os.getenv('PERF_LATENCY_FACTOR', 1))
+REPEATS = int(os.getenv('PERF_REPEATS', 20))
+
+CATEGORIES = 5
+GENRES = 20 * SCALE
+USERS = 50 * SCALE
+TITLES = 200 * SCALE
+REVIEWS_PER_TITLE = 10
+COMMENTS_PER_REVIEW = 3
+
+# Бюджеты GET-маршрутов v1_router: запросы к БД при пустом кэше
+# (включая загрузку пользователя по токену) и p95 времени ответа в секундах.
+BUDGETS = {
+    'api-root': (1, 0.05),
+    'title-list': (4, 0.15),
+    'title-detail': (3, 0.1),
+    'category-list': (3, 0.1),
+    'genre-list': (3, 0.1),
+    'users-list': (3, 0.1),
+    'users-detail': (2, 0.1),
+    'users-profile': (1, 0.05),
+    'reviews-list': (4, 0.1),
+    'reviews-detail': (3, 0.1),
+    'comments-list': (4, 0.1),
+    'comments-detail': (3, 0.1),
+}
+
+# Бюджеты запросов к БД для изменяющих маршрутов v1_router. Удаление
+# категории каскадно удаляет её произведения с отзывами пачками, поэтому
+# его бюджет растёт с размером набора данных.
+WRITE_BUDGETS = {
+    ('title-list', 'post'): 9,
+    ('title-bulk', 'post'): 8,
+    ('title-detail', 'patch'): 6,
+    ('title-detail', 'delete'): 9,
+    ('category-list', 'post'): 2,
+    ('category-detail', 'delete'): 6 + 20 * SCALE,
+    ('genre-list', 'post'): 2,
+    ('genre-detail', 'delete'): 3,
+    ('users-list', 'post'): 3,
+    ('users-detail', 'patch'): 2,
+    ('users-detail', 'delete'): 12,
+    ('users-profile', 'patch'): 2,
+    ('reviews-list', 'post'): 5,
+    ('reviews-detail', 'patch'): 6,
+    ('reviews-detail', 'delete'): 5,
+    ('comments-list', 'post'): 2,
+    ('comments-detail', 'patch'): 3,
+    ('comments-detail', 'delete'): 3,
+}
+WRITE_METHODS = ('post', 'patch', 'delete')
+
+
+def seed(rng):
+    """Синтетический каталог с явными id: bulk_create в SQLite их не вернёт."""
+    now = timezone.now()
+    Category.objects.bulk_create(
+        Category(id=idx, name=f'Категория {idx}', slug=f'category-{idx}')
+        for idx in range(1, CATEGORIES + 1)
+    )
+    Genre.objects.bulk_create(
+        Genre(id=idx, name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(1, GENRES + 1)
+    )
+    User.objects.bulk_create(
+        User(id=idx, username=f'user{idx}', email=f'user{idx}@yamdb.fake')
+        for idx in range(1, USERS + 1)
+    )
+    Title.objects.bulk_create(
+        Title(
+            id=idx,
+            name=f'Произведение {idx}',
+            year=rng.randint(1900, now.year),
+            category_id=rng.randint(1, CATEGORIES),
+        )
+        for idx in range(1, TITLES + 1)
+    )
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title_id=title_id, genre_id=genre_id)
+        for title_id in range(1, TITLES + 1)
+        for genre_id in rng.sample(range(1, GENRES + 1), 3)
+    )
+    reviews = [
+        Review(
+            id=(title_id - 1) * REVIEWS_PER_TITLE + idx + 1,
+            title_id=title_id,
+            author_id=author_id,
+            text='Отзыв',
+            score=rng.randint(1, 10),
+        )
+        for title_id in range(1, TITLES + 1)
+        for idx, author_id in enumerate(
+            rng.sample(range(1, USERS + 1), REVIEWS_PER_TITLE)
+        )
+    ]
+    Review.objects.bulk_create(reviews, batch_size=1000)
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                review_id=review.id,
+                author_id=rng.randint(1, USERS),
+                text='Комментарий',
+                pub_date=now - timedelta(minutes=idx),
+            )
+            for review in reviews
+            for idx in range(COMMENTS_PER_REVIEW)
+        ),
+        batch_size=1000
+    )
+    Title.objects.rebuild_ratings()
+
+
+@pytest.fixture(scope='module')
+def dataset(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        seed(random.Random(0))
+        admin = User.objects.create_user(
+            username='PerfAdmin', email='perfadmin@yamdb.fake', role='admin'
+        )
+        yield {
+            'admin': admin,
+            'title': Title.objects.get(pk=1),
+            'review': Review.objects.get(pk=1),
+            'comment': Comment.objects.filter(review_id=1).first(),
+            'user': User.objects.get(pk=1),
+        }
+        call_command('flush', interactive=False, verbosity=0)
+
+
+def route_kwargs(name, dataset):
+    return {
+        'title-detail': {'pk': dataset['title'].pk},
+        'users-detail': {'username': dataset['user'].username},
+        'reviews-list': {'title_id': dataset['title'].pk},
+        'reviews-detail': {
+            'title_id': dataset['title'].pk, 'pk': dataset['review'].pk
+        },
+        'comments-list': {
+            'title_id': dataset['title'].pk,
+            'review_id': dataset['review'].pk,
+        },
+        'comments-detail': {
+            'title_id': dataset['title'].pk,
+            'review_id': dataset['review'].pk,
+            'pk': dataset['comment'].pk,
+        },
+    }.get(name, {})
+
+
+def get_routes():
+    """Имена маршрутов v1_router, отвечающих на GET."""
+    return sorted({
+        pattern.name for pattern in v1_router.urls
+        if 'get' in getattr(pattern.callback, 'actions', {'get': None})
+    })
+
+
+def get_write_routes():
+    """Пары (имя маршрута, метод) изменяющих маршрутов v1_router."""
+    return sorted({
+        (pattern.name, method) for pattern in v1_router.urls
+        for method in getattr(pattern.callback, 'actions', {})
+        if method in WRITE_METHODS
+        and method in pattern.callback.cls.http_method_names
+    })
+
+
+def write_data(name, dataset):
+    """Тело запроса к изменяющему маршруту."""
+    title = {
+        'name': 'Новое произведение',
+        'year': 2000,
+        'category': 'category-1',
+        'genre': ['genre-1', 'genre-2'],
+    }
+    return {
+        'title-list': title,
+        'title-bulk': [title],
+        'title-detail': {'name': 'Новое название'},
+        'category-list': {'name': 'Новая', 'slug': 'new-category'},
+        'genre-list': {'name': 'Новый', 'slug': 'new-genre'},
+        'users-list': {'username': 'newuser', 'email': 'new@yamdb.fake'},
+        'users-detail': {'bio': 'Биография'},
+        'users-profile': {'bio': 'Биография'},
+        'reviews-list': {'text': 'Отзыв', 'score': 5},
+        'reviews-detail': {'score': 3},
+        'comments-list': {'text': 'Комментарий'},
+        'comments-detail': {'text': 'Новый текст'},
+    }.get(name)
+
+
+def write_kwargs(name, dataset):
+    return {
+        'category-detail': {'slug': 'category-1'},
+        'genre-detail': {'slug': 'genre-1'},
+    }.get(name, route_kwargs(name, dataset))
+
+
+def admin_client(dataset):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(dataset["admin"])}'
+    )
+    return client
+
+
+def test_every_route_has_budget():
+    missing = set(get_routes()) - set(BUDGETS)
+    assert not missing, (
+        'Для маршрутов v1_router должны быть заданы бюджеты запросов '
+        f'и времени ответа в `BUDGETS`: {", ".join(sorted(missing))}.'
+    )
+    missing = set(get_write_routes()) - set(WRITE_BUDGETS)
+    assert not missing, (
+        'Для изменяющих маршрутов v1_router должны быть заданы бюджеты '
+        'запросов в `WRITE_BUDGETS`: '
+        + ', '.join(f'{method.upper()} {name}' for name, method in missing)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', get_routes())
+def test_route_within_budget(name, dataset):
+    query_budget, _ = BUDGETS[name]
+    client = admin_client(dataset)
+    url = reverse(name, kwargs=route_kwargs(name, dataset))
+
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом '
+        '200.'
+    )
+    assert len(queries.captured_queries) <= query_budget, (
+        f'GET-запрос к `{url}` выполнил {len(queries.captured_queries)} '
+        f'запросов к базе данных при бюджете {query_budget}.\n'
+        + '\n'.join(query['sql'] for query in queries.captured_queries)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name,method', get_write_routes())
+def test_write_route_within_budget(name, method, dataset):
+    client = admin_client(dataset)
+    url = reverse(name, kwargs=write_kwargs(name, dataset))
+    # Пользователь, реестры и поисковый индекс загружаются один раз.
+    client.get(reverse('api-root'))
+    title_search()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(
+            url, data=write_data(name, dataset), format='json'
+        )
+    assert response.status_code < 300, (
+        f'Проверьте, что {method.upper()}-запрос к `{url}` выполняется '
+        f'успешно: {response.status_code} {response.content[:200]!r}'
+    )
+    query_budget = WRITE_BUDGETS[name, method]
+    assert len(queries.captured_queries) <= query_budget, (
+        f'{method.upper()}-запрос к `{url}` выполнил '
+        f'{len(queries.captured_queries)} запросов к базе данных при '
+        f'бюджете {query_budget}.\n'
+        + '\n'.join(query['sql'] for query in queries.captured_queries)
+    )
+
+
+@pytest.mark.skipif(
+    not CHECK_LATENCY, reason='Время ответа проверяется с PERF_LATENCY=1.'
+)
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', get_routes())
+def test_route_latency(name, dataset):
+    _, latency_budget = BUDGETS[name]
+    client = admin_client(dataset)
+    url = reverse(name, kwargs=route_kwargs(name, dataset))
+    client.get(url)
+
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        client.get(url)
+        timings.append(time.perf_counter() - started)
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    assert p95 <= latency_budget * LATENCY_FACTOR, (
+        f'p95 времени ответа на GET-запрос к `{url}` составил {p95:.3f} с '
+        f'при бюджете {latency_budget * LATENCY_FACTOR:.3f} с.'
+    )
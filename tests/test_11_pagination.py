@@ -0,0 +1,122 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_version
+from api.pagination import count_namespace
+from reviews.models import Review, Title
+from tests.utils import create_titles
+
+
+def create_many_reviews(django_user_model, title_id, count):
+    title = Title.objects.get(pk=title_id)
+    for idx in range(count):
+        author = django_user_model.objects.create_user(
+            username=f'reviewer{idx}', email=f'reviewer{idx}@yamdb.fake'
+        )
+        Review.objects.create(
+            title=title, author=author, text=f'Отзыв {idx}', score=5
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11Pagination:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_reviews_cursor_pagination(self, client, admin_client,
+                                          django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_many_reviews(django_user_model, title_id, 12)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title_id)
+
+        response = client.get(url, {'pagination': 'cursor'})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data and data['next'], (
+            f'Проверьте, что GET-запрос к `{url}` с параметром '
+            '`pagination=cursor` возвращает страницу с курсором.'
+        )
+        seen = [review['id'] for review in data['results']]
+        while data['next']:
+            data = client.get(data['next']).json()
+            seen.extend(review['id'] for review in data['results'])
+
+        expected = list(
+            Review.objects.filter(title_id=title_id).order_by(
+                '-pub_date', '-id'
+            ).values_list('id', flat=True)
+        )
+        assert seen == expected, (
+            'Проверьте, что обход страниц по курсору возвращает все отзывы '
+            'в порядке от новых к старым без повторов и пропусков.'
+        )
+
+    def test_02_page_number_pagination_kept(self, client, admin_client,
+                                            django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        create_many_reviews(django_user_model, titles[0]['id'], 7)
+        data = client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            {'page': 2}
+        ).json()
+        assert data['count'] == 7
+        assert len(data['results']) == 2
+
+    def test_03_count_cached_and_invalidated(self, client, admin_client,
+                                             django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_many_reviews(django_user_model, title_id, 3)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title_id)
+        assert client.get(url).json()['count'] == 3
+
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get(url).json()['count'] == 3
+        assert not any(
+            'COUNT(' in query['sql'] for query in queries.captured_queries
+        ), (
+            f'Проверьте, что повторный GET-запрос к `{url}` берёт количество '
+            'отзывов из кэша.'
+        )
+
+        Review.objects.filter(title_id=title_id).first().delete()
+        assert client.get(url).json()['count'] == 2, (
+            'Проверьте, что кэшированное количество сбрасывается при '
+            'удалении отзыва.'
+        )
+
+        version = get_version(count_namespace(Review))
+        with transaction.atomic():
+            Review.objects.filter(title_id=title_id).first().delete()
+            assert get_version(count_namespace(Review)) == version, (
+                'Проверьте, что кэшированное количество сбрасывается только '
+                'после фиксации транзакции.'
+            )
+        assert client.get(url).json()['count'] == 1
+
+    def test_04_count_omitted(self, client, admin_client, django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        create_many_reviews(django_user_model, titles[0]['id'], 6)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get(url, {'count': 'false'}).json()
+        assert 'count' not in data, (
+            f'Проверьте, что GET-запрос к `{url}` с параметром `count=false` '
+            'возвращает ответ без поля `count`.'
+        )
+        assert not any(
+            'COUNT(' in query['sql'] for query in queries.captured_queries
+        )
+        assert len(data['results']) == 5 and data['next']
+
+        data = client.get(data['next']).json()
+        assert len(data['results']) == 1
+        assert data['next'] is None and data['previous']
+        assert client.get(
+            url, {'count': 'false', 'page': 3}
+        ).status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,195 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from smtplib import SMTPException
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.constants import EMAIL_FAILED, EMAIL_PENDING, EMAIL_SENT
+from reviews.admin import OutgoingEmailAdmin
+from reviews.mailing import claim_pending, deliver, metrics
+from reviews.models import OutgoingEmail
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise SMTPException('Сервер недоступен')
+
+
+class CountingBackend(EmailBackend):
+    """Почтовый бэкенд, который считает открытые соединения."""
+
+    opened = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.is_open = False
+
+    def open(self):
+        if self.is_open:
+            return False
+        self.is_open = True
+        CountingBackend.opened += 1
+        return True
+
+    def close(self):
+        self.is_open = False
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12MailQueue:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def test_01_signup_only_enqueues(self, client, settings):
+        settings.EMAIL_QUEUE_EAGER = False
+        outbox_before_count = len(mail.outbox)
+        response = client.post(
+            self.URL_SIGNUP,
+            data={'email': 'queued@yamdb.fake', 'username': 'queued'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что регистрация не отправляет письмо в запросе, '
+            'а ставит его в очередь.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.status == EMAIL_PENDING
+        assert email.recipient == 'queued@yamdb.fake'
+
+        call_command('send_emails', '--once', '--workers', '2', stdout=None)
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert mail.outbox[-1].to == ['queued@yamdb.fake']
+        email.refresh_from_db()
+        assert email.status == EMAIL_SENT and email.sent_at
+        assert email.body == '', (
+            'Проверьте, что текст отправленного письма с кодом '
+            'подтверждения стирается из очереди.'
+        )
+
+    def test_02_failed_delivery_retried_with_backoff(self, settings):
+        settings.EMAIL_QUEUE_EAGER = False
+        settings.EMAIL_QUEUE_MAX_ATTEMPTS = 2
+        settings.EMAIL_BACKEND = 'tests.test_12_mail_queue.FailingBackend'
+        email = OutgoingEmail.objects.create(
+            subject='Тема', body='Текст', from_email='admin@yamdb.fake',
+            recipient='user@yamdb.fake'
+        )
+
+        assert deliver(claim_pending(10)) == 0
+        email.refresh_from_db()
+        assert email.status == EMAIL_PENDING
+        assert email.attempts == 1
+        assert email.next_attempt_at > timezone.now()
+        assert 'Сервер недоступен' in email.last_error
+        assert claim_pending(10) == [], (
+            'Проверьте, что письмо не отправляется повторно до истечения '
+            'задержки.'
+        )
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        deliver(claim_pending(10))
+        email.refresh_from_db()
+        assert email.status == EMAIL_FAILED
+        assert email.attempts == 2
+        assert email.body == '', (
+            'Проверьте, что текст недоставленного письма стирается.'
+        )
+
+    def test_03_worker_reuses_connection(self, settings):
+        settings.EMAIL_QUEUE_EAGER = False
+        settings.EMAIL_BACKEND = 'tests.test_12_mail_queue.CountingBackend'
+        CountingBackend.opened = 0
+        outbox_before_count = len(mail.outbox)
+        OutgoingEmail.objects.bulk_create(
+            OutgoingEmail(
+                subject='Тема', body='Текст', from_email='admin@yamdb.fake',
+                recipient=f'user{idx}@yamdb.fake'
+            )
+            for idx in range(5)
+        )
+
+        out = StringIO()
+        call_command('send_emails', '--once', '--batch-size', '2', stdout=out)
+        assert len(mail.outbox) == outbox_before_count + 5
+        assert CountingBackend.opened == 1, (
+            'Проверьте, что обработчик очереди отправляет все пачки писем '
+            'через одно соединение с почтовым сервером.'
+        )
+        stats = metrics.snapshot()
+        assert stats['sent'] == 5
+        assert stats['batches'] == 3
+        assert stats['connections'] == 1
+        assert 'писем/с' in out.getvalue()
+
+    def test_04_expired_lease_reclaimed(self, settings):
+        settings.EMAIL_QUEUE_EAGER = False
+        settings.EMAIL_QUEUE_LEASE_TIMEOUT = 60
+        email = OutgoingEmail.objects.create(
+            subject='Тема', body='Текст', from_email='admin@yamdb.fake',
+            recipient='user@yamdb.fake'
+        )
+        assert claim_pending(10) == [email]
+        assert claim_pending(10) == [], (
+            'Проверьте, что письмо в работе у другого обработчика не '
+            'забирается до истечения аренды.'
+        )
+
+        OutgoingEmail.objects.update(
+            claimed_at=timezone.now() - timedelta(seconds=61)
+        )
+        assert claim_pending(10) == [email], (
+            'Проверьте, что письма упавшего обработчика снова забираются '
+            'в работу после истечения EMAIL_QUEUE_LEASE_TIMEOUT.'
+        )
+
+    def test_05_throughput_uses_wall_clock(self):
+        metrics.reset()
+        # Два потока параллельно отправили по пачке за 10 секунд каждый.
+        metrics.record(5, 0, 1, 10.0)
+        metrics.record(5, 0, 1, 10.0)
+        stats = metrics.snapshot()
+        assert stats['seconds'] == 20.0
+        assert stats['per_second'] > stats['sent'] / stats['seconds'], (
+            'Проверьте, что скорость отправки считается по времени работы '
+            'обработчика, а не по сумме времени потоков.'
+        )
+
+    def test_06_finished_emails_purged(self, settings):
+        settings.EMAIL_QUEUE_EAGER = False
+        settings.EMAIL_QUEUE_RETENTION = 60
+        emails = OutgoingEmail.objects.bulk_create(
+            OutgoingEmail(
+                subject='Тема', body='Текст', from_email='admin@yamdb.fake',
+                recipient=f'user{idx}@yamdb.fake', status=status,
+                claimed_at=timezone.now() - timedelta(seconds=61)
+            )
+            for idx, status in enumerate(
+                (EMAIL_SENT, EMAIL_FAILED, EMAIL_PENDING)
+            )
+        )
+        OutgoingEmail.objects.create(
+            subject='Тема', body='', from_email='admin@yamdb.fake',
+            recipient='fresh@yamdb.fake', status=EMAIL_SENT,
+            claimed_at=timezone.now()
+        )
+
+        call_command('send_emails', '--once', stdout=StringIO())
+
+        assert set(OutgoingEmail.objects.values_list(
+            'recipient', flat=True
+        )) == {emails[2].recipient, 'fresh@yamdb.fake'}, (
+            'Проверьте, что обработчик очереди удаляет отправленные и '
+            'недоставленные письма старше EMAIL_QUEUE_RETENTION.'
+        )
+
+    def test_07_admin_hides_body(self):
+        assert 'body' in OutgoingEmailAdmin.exclude, (
+            'Проверьте, что текст писем не показывается в админке.'
+        )
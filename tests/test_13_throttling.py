@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+
+from api.throttling import TokenBucketThrottle
+
+
+@pytest.mark.django_db
+class Test13AuthThrottling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    def signup(self, client, idx, ip='10.0.0.1', username=None):
+        return client.post(
+            self.URL_SIGNUP,
+            data={
+                'email': f'user{idx}@yamdb.fake',
+                'username': username or f'user{idx}',
+            },
+            REMOTE_ADDR=ip,
+        )
+
+    def test_01_signup_limited_per_ip(self, client, settings):
+        settings.AUTH_THROTTLE_RATES = {'signup_ip': '2/min'}
+        assert self.signup(client, 1).status_code == HTTPStatus.OK
+        assert self.signup(client, 2).status_code == HTTPStatus.OK
+        response = self.signup(client, 3)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что частые POST-запросы к `{self.URL_SIGNUP}` с '
+            'одного IP-адреса ограничиваются статусом 429.'
+        )
+        assert 'Retry-After' in response
+        assert self.signup(
+            client, 3, ip='10.0.0.2'
+        ).status_code == HTTPStatus.OK
+
+    def test_02_token_limited_per_username(self, client, settings):
+        settings.AUTH_THROTTLE_RATES = {'token_username': '2/min'}
+        data = {'username': 'unexisting_user', 'confirmation_code': 12345}
+        for ip in ('10.0.0.1', '10.0.0.2'):
+            response = client.post(self.URL_TOKEN, data=data, REMOTE_ADDR=ip)
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.post(
+            self.URL_TOKEN, data=data, REMOTE_ADDR='10.0.0.3'
+        )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что подбор кода для одного `username` с разных '
+            'IP-адресов ограничивается статусом 429.'
+        )
+
+    def test_03_bucket_refills(self, client, settings, monkeypatch):
+        settings.AUTH_THROTTLE_RATES = {'signup_ip': '2/min'}
+        now = [1000.0]
+        monkeypatch.setattr(TokenBucketThrottle, 'timer', lambda _: now[0])
+        self.signup(client, 1)
+        self.signup(client, 2)
+        assert self.signup(
+            client, 3
+        ).status_code == HTTPStatus.TOO_MANY_REQUESTS
+        now[0] += 30
+        assert self.signup(client, 3).status_code == HTTPStatus.OK, (
+            'Проверьте, что корзина токенов пополняется со временем.'
+        )
+        assert self.signup(
+            client, 4
+        ).status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+    def test_04_repeated_signup_sends_one_email(self, client):
+        outbox_before_count = len(mail.outbox)
+        for _ in range(3):
+            assert self.signup(client, 1).status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            f'Проверьте, что повторные POST-запросы к `{self.URL_SIGNUP}` '
+            'для того же пользователя не отправляют письмо повторно.'
+        )
+
+    @pytest.mark.parametrize('url', (URL_SIGNUP, URL_TOKEN))
+    def test_05_non_object_body(self, client, url):
+        response = client.post(
+            url, data='[1, 2]', content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что POST-запрос к `{url}` с телом, которое не '
+            'является объектом JSON, возвращает ответ со статусом 400.'
+        )
+
+    def test_06_forwarded_for_ignored(self, client, settings):
+        settings.AUTH_THROTTLE_RATES = {'signup_ip': '2/min'}
+        for idx in range(2):
+            self.signup(client, idx)
+        response = client.post(
+            self.URL_SIGNUP,
+            data={'email': 'user9@yamdb.fake', 'username': 'user9'},
+            REMOTE_ADDR='10.0.0.1',
+            HTTP_X_FORWARDED_FOR='192.168.0.9',
+        )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что ограничение по IP-адресу не обходится '
+            'заголовком X-Forwarded-For.'
+        )
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+
+import pytest
+from django.db import connection, transaction
+
+from reviews.models import Comment, Review, Title
+
+
+@contextmanager
+def prefer_indexes():
+    """
+    На пустых таблицах PostgreSQL выбирает последовательное чтение,
+    поэтому в нём план проверяется с запретом seq scan.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        yield
+
+
+QUERIES = (
+    (
+        'title_year_name_idx',
+        lambda: Title.objects.all()[:5],
+    ),
+    (
+        'title_year_name_idx',
+        lambda: Title.objects.filter(year=2000)[:5],
+    ),
+    (
+        'title_category_year_name_idx',
+        lambda: Title.objects.filter(category__slug='films')[:5],
+    ),
+    (
+        'review_title_pub_date_idx',
+        lambda: Review.objects.filter(title_id=1).order_by(
+            '-pub_date', '-id'
+        )[:5],
+    ),
+    (
+        'comment_review_pub_date_idx',
+        lambda: Comment.objects.filter(review_id=1).order_by(
+            '-pub_date', '-id'
+        )[:5],
+    ),
+)
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor not in ('sqlite', 'postgresql'),
+    reason='Планы запросов проверяются для SQLite и PostgreSQL.'
+)
+@pytest.mark.parametrize('index,queryset', QUERIES)
+def test_query_uses_index(index, queryset):
+    with prefer_indexes():
+        plan = queryset().explain()
+    assert index in plan, (
+        f'Проверьте, что запрос использует индекс `{index}`.\n'
+        f'{queryset().query}\n{plan}'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Формат плана SQLite.'
+)
+def test_genre_filter_does_not_scan_titles():
+    plan = Title.objects.filter(genre__slug='drama')[:5].explain()
+    assert 'SCAN reviews_title\n' not in plan + '\n', (
+        'Проверьте, что фильтр по жанру не перебирает всю таблицу '
+        f'произведений.\n{plan}'
+    )
@@ -0,0 +1,84 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from reviews.models import Category, Title
+from reviews.search import TABLE, SQLiteTitleSearch, TitleSearch, title_search
+
+URL_TITLES = '/api/v1/titles/'
+
+
+@pytest.fixture
+def titles():
+    category = Category.objects.create(name='Фильм', slug='films')
+    return {
+        name: Title.objects.create(
+            name=name, year=2000, category=category, description=description
+        )
+        for name, description in (
+            ('Тёмный город', ''),
+            ('Город грехов', 'Комикс'),
+            ('Море', 'Город у моря'),
+            ('Ветер', ''),
+        )
+    }
+
+
+def search(client, query):
+    response = client.get(URL_TITLES, {'search': query})
+    assert response.status_code == 200
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db
+class Test15TitleSearch:
+
+    def test_01_search_ignores_case(self, client, titles):
+        found = search(client, 'ГОРОД')
+        assert set(found) == {'Тёмный город', 'Город грехов', 'Море'}, (
+            f'Проверьте, что параметр `search` в `{URL_TITLES}` находит '
+            'произведения без учёта регистра.'
+        )
+
+    def test_02_search_ranks_name_matches_first(self, client, titles):
+        found = search(client, 'город')
+        assert found[-1] == 'Море', (
+            'Проверьте, что совпадения в названии выше совпадений в '
+            'описании.'
+        )
+
+    def test_03_search_by_prefix_and_all_words(self, client, titles):
+        assert search(client, 'гор грех') == ['Город грехов']
+        assert search(client, 'ночь') == []
+
+    def test_04_index_follows_changes(self, client, titles):
+        title = titles['Ветер']
+        title.name = 'Северный ветер'
+        title.save()
+        assert search(client, 'северный') == ['Северный ветер']
+        title.delete()
+        assert search(client, 'ветер') == []
+
+    def test_05_search_uses_fts_index(self, titles):
+        if not isinstance(title_search(), SQLiteTitleSearch):
+            pytest.skip('Поиск работает не на SQLite FTS5.')
+        plan = title_search().search(Title.objects.all(), 'город').explain()
+        assert 'VIRTUAL TABLE INDEX' in plan, (
+            'Проверьте, что поиск использует полнотекстовый индекс.\n'
+            f'{plan}'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15SearchIndexFlush:
+
+    def test_01_flush_clears_search_index(self, titles):
+        if type(title_search()) is TitleSearch:
+            pytest.skip('Поиск работает без отдельного индекса.')
+        call_command('flush', interactive=False)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {TABLE}')
+            assert cursor.fetchone()[0] == 0, (
+                'Проверьте, что после flush в поисковом индексе не '
+                'остаётся записей удалённых произведений.'
+            )
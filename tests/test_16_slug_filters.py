@@ -0,0 +1,114 @@
+import pytest
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api import registry
+from reviews.models import Category, Genre, Title
+from reviews.signals import bulk_loaded
+
+URL_TITLES = '/api/v1/titles/'
+
+
+@pytest.fixture
+def catalogue():
+    films = Category.objects.create(name='Фильм', slug='films')
+    books = Category.objects.create(name='Книга', slug='books')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    melodrama = Genre.objects.create(name='Мелодрама', slug='melodrama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    for name, category, genres in (
+        ('Драма', films, (drama,)),
+        ('Мелодрама', films, (melodrama,)),
+        ('Трагикомедия', books, (drama, comedy)),
+        ('Комедия', books, (comedy,)),
+    ):
+        title = Title.objects.create(name=name, year=2000, category=category)
+        title.genre.set(genres)
+
+
+def names(client, **params):
+    response = client.get(URL_TITLES, params)
+    assert response.status_code == 200
+    return {title['name'] for title in response.json()['results']}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16SlugFilters:
+
+    def test_01_exact_slug(self, client, catalogue):
+        assert names(client, genre='drama') == {'Драма', 'Трагикомедия'}, (
+            'Проверьте, что фильтр `genre` сравнивает slug целиком.'
+        )
+        assert names(client, category='films') == {'Драма', 'Мелодрама'}
+
+    def test_02_any_and_all_genres(self, client, catalogue):
+        assert names(client, genre='drama,comedy') == {
+            'Драма', 'Трагикомедия', 'Комедия'
+        }
+        assert names(client, genre_all='drama,comedy') == {'Трагикомедия'}
+        assert names(client, genre_all='drama,unknown') == set()
+        assert names(client, genre='unknown') == set()
+        assert names(client, category='films,books') == {
+            'Драма', 'Мелодрама', 'Трагикомедия', 'Комедия'
+        }
+
+    def test_03_substring_is_opt_in(self, client, catalogue):
+        assert names(client, genre_contains='drama') == {
+            'Драма', 'Мелодрама', 'Трагикомедия'
+        }
+        assert names(client, category_contains='film') == {
+            'Драма', 'Мелодрама'
+        }
+
+    def test_04_filters_on_ids(self, client, catalogue):
+        client.get(URL_TITLES, {'genre': 'drama', 'category': 'books'})
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                URL_TITLES, {'genre': 'drama', 'category': 'books'}
+            )
+        assert response.status_code == 200
+        sql = '\n'.join(query['sql'] for query in queries.captured_queries)
+        assert '"slug" IN' not in sql and '"slug" =' not in sql, (
+            'Проверьте, что slug категорий и жанров берутся из кэша, а '
+            f'произведения фильтруются по id.\n{sql}'
+        )
+
+    def test_05_slug_map_follows_changes(self, client, catalogue):
+        assert names(client, genre='comedy') == {'Трагикомедия', 'Комедия'}
+        genre = Genre.objects.get(slug='comedy')
+        with transaction.atomic():
+            genre.slug = 'funny'
+            genre.save()
+            assert registry.genres.get('funny') is None, (
+                'Проверьте, что реестр жанров перечитывается только после '
+                'фиксации транзакции.'
+            )
+        assert names(client, genre='comedy') == set()
+        assert names(client, genre='funny') == {'Трагикомедия', 'Комедия'}
+
+    def test_06_registry_finds_bulk_created(self, client, admin_client,
+                                            catalogue):
+        assert names(client, genre='drama') == {'Драма', 'Трагикомедия'}
+        Genre.objects.bulk_create((Genre(name='Новый', slug='newg'),))
+        Category.objects.bulk_create(
+            (Category(name='Новая', slug='newc'),)
+        )
+        response = admin_client.post(URL_TITLES, data={
+            'name': 'Новинка', 'year': 2000,
+            'category': 'newc', 'genre': ['newg'],
+        })
+        assert response.status_code == 201, (
+            'Проверьте, что категории и жанры, созданные в обход сигналов, '
+            'находятся реестром.'
+        )
+        assert names(client, genre='newg') == {'Новинка'}
+        assert names(client, category='newc') == {'Новинка'}
+
+    def test_07_bulk_loaded_invalidates_registry(self, client, catalogue):
+        assert names(client, genre='comedy') == {'Трагикомедия', 'Комедия'}
+        Genre.objects.filter(slug='comedy').update(slug='funny')
+        bulk_loaded.send(sender=Genre, using=DEFAULT_DB_ALIAS)
+        assert names(client, genre='comedy') == set(), (
+            'Проверьте, что после массовой загрузки жанров реестр '
+            'перечитывается.'
+        )
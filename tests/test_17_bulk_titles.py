@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from reviews.models import Category, Genre, Title
+
+URL_BULK = '/api/v1/titles/bulk/'
+URL_TITLES = '/api/v1/titles/'
+
+
+@pytest.fixture
+def catalogue():
+    Category.objects.create(name='Фильм', slug='films')
+    Genre.objects.create(name='Драма', slug='drama')
+    Genre.objects.create(name='Комедия', slug='comedy')
+
+
+def payload():
+    return [
+        {'name': 'Первое', 'year': 2000, 'category': 'films',
+         'genre': ['drama', 'comedy'], 'description': 'Описание'},
+        {'name': 'Второе', 'year': 3000, 'category': 'films',
+         'genre': ['drama']},
+        {'name': 'Третье', 'year': 2001, 'category': 'films',
+         'genre': ['unknown']},
+        {'name': 'Четвёртое', 'year': 2002, 'category': 'films',
+         'genre': ['comedy', 'comedy']},
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17BulkTitles:
+
+    def check_results(self, client, response):
+        assert response.status_code == 201, (
+            f'Проверьте, что POST-запрос администратора к `{URL_BULK}` '
+            'возвращает ответ со статусом 201.'
+        )
+        results = response.json()
+        assert [item['index'] for item in results] == [0, 1, 2, 3]
+        assert 'errors' in results[1] and 'year' in results[1]['errors']
+        assert 'errors' in results[2] and 'genre' in results[2]['errors']
+        created = {
+            results[index]['id']: name
+            for index, name in ((0, 'Первое'), (3, 'Четвёртое'))
+        }
+        assert dict(Title.objects.values_list('id', 'name')) == created, (
+            'Проверьте, что создаются только корректные произведения.'
+        )
+        first = Title.objects.get(pk=results[0]['id'])
+        assert set(first.genre.values_list('slug', flat=True)) == {
+            'drama', 'comedy'
+        }
+        assert first.description == 'Описание'
+        listing = client.get(URL_TITLES, {'search': 'первое'}).json()
+        assert listing['count'] == 1, (
+            'Проверьте, что созданные произведения попадают в поиск.'
+        )
+        assert client.get(URL_TITLES).json()['count'] == 2
+
+    def test_01_bulk_json(self, admin_client, catalogue):
+        response = admin_client.post(URL_BULK, data=payload(), format='json')
+        self.check_results(admin_client, response)
+
+    def test_02_bulk_ndjson(self, admin_client, catalogue):
+        response = admin_client.post(
+            URL_BULK,
+            data='\n'.join(json.dumps(item) for item in payload()),
+            content_type='application/x-ndjson',
+        )
+        self.check_results(admin_client, response)
+
+    def test_03_bulk_rejects_invalid_body(self, admin_client, catalogue):
+        response = admin_client.post(
+            URL_BULK, data={'name': 'Одно'}, format='json'
+        )
+        assert response.status_code == 400
+        response = admin_client.post(
+            URL_BULK, data='{"name": ', content_type='application/x-ndjson'
+        )
+        assert response.status_code == 400
+        assert not Title.objects.exists()
+
+    def test_04_bulk_admin_only(self, client, user_client, moderator_client,
+                                catalogue):
+        assert client.post(
+            URL_BULK, data=payload(), content_type='application/json'
+        ).status_code == 401
+        for api_client in (user_client, moderator_client):
+            assert api_client.post(
+                URL_BULK, data=payload(), format='json'
+            ).status_code == 403, (
+                f'Проверьте, что `{URL_BULK}` доступен только '
+                'администратору.'
+            )
+        assert not Title.objects.exists()
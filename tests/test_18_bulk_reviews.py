@@ -0,0 +1,128 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Review, Title
+
+URL_BULK = '/api/v1/reviews/bulk/'
+
+
+@pytest.fixture
+def titles():
+    category = Category.objects.create(name='Фильм', slug='films')
+    return [
+        Title.objects.create(name=f'Фильм {idx}', year=2000, category=category)
+        for idx in range(2)
+    ]
+
+
+def ndjson(items):
+    return '\n'.join(json.dumps(item) for item in items)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18BulkReviews:
+
+    def test_01_bulk_reviews(self, moderator_client, admin, user, titles,
+                             client):
+        first, second = titles
+        Review.objects.create(title=first, author=admin, text='Было', score=2)
+        client.get(f'/api/v1/titles/{first.pk}/')
+        items = [
+            {'title': first.pk, 'author': user.username, 'text': 'Да',
+             'score': 10},
+            {'title': second.pk, 'author': user.username, 'text': 'Да',
+             'score': 4},
+            {'title': first.pk, 'author': admin.username, 'text': 'Повтор',
+             'score': 5},
+            {'title': second.pk, 'author': user.username, 'text': 'Повтор',
+             'score': 5},
+            {'title': second.pk, 'author': admin.username, 'text': 'Много',
+             'score': 11},
+            {'title': 0, 'author': admin.username, 'text': 'Нет', 'score': 1},
+            {'title': second.pk, 'author': 'ghost', 'text': 'Нет',
+             'score': 1},
+            {'title': second.pk, 'author': admin.username, 'text': 'Да',
+             'score': 6},
+        ]
+        response = moderator_client.post(
+            URL_BULK, data=ndjson(items), content_type='application/x-ndjson'
+        )
+        assert response.status_code == 201, (
+            f'Проверьте, что POST-запрос модератора к `{URL_BULK}` '
+            'возвращает ответ со статусом 201.'
+        )
+        results = response.json()
+        assert [item['index'] for item in results] == list(range(8))
+        assert [bool(item.get('errors')) for item in results] == [
+            False, False, True, True, True, True, True, False
+        ], results
+        assert 'score' in results[4]['errors']
+        assert 'title' in results[5]['errors']
+        assert 'author' in results[6]['errors']
+        assert Review.objects.count() == 4
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert (first.rating_sum, first.rating_count) == (12, 2)
+        assert (second.rating_sum, second.rating_count) == (10, 2), (
+            'Проверьте, что рейтинги произведений пересчитываются после '
+            'массовой загрузки отзывов.'
+        )
+        assert client.get(
+            f'/api/v1/titles/{first.pk}/'
+        ).json()['rating'] == 6, (
+            'Проверьте, что кэш произведения сбрасывается после массовой '
+            'загрузки отзывов.'
+        )
+
+    def test_02_queries_do_not_grow(self, admin_client, admin, user, titles):
+        def count_queries(items):
+            Review.objects.all().delete()
+            with CaptureQueriesContext(connection) as queries:
+                response = admin_client.post(
+                    URL_BULK, data=items, format='json'
+                )
+            assert response.status_code == 201
+            return len(queries.captured_queries)
+
+        # Пользователь из токена кэшируется первым запросом.
+        admin_client.post(URL_BULK, data=[], format='json')
+        one = count_queries([
+            {'title': titles[0].pk, 'author': user.username, 'text': 'Да',
+             'score': 5},
+        ])
+        many = count_queries([
+            {'title': title.pk, 'author': author.username, 'text': 'Да',
+             'score': 5}
+            for title in titles for author in (admin, user)
+        ])
+        assert one == many, (
+            'Проверьте, что число запросов к базе данных при массовой '
+            'загрузке не зависит от числа отзывов.'
+        )
+
+    def test_03_bulk_reviews_permissions(self, client, user_client, titles,
+                                         user):
+        items = [{'title': titles[0].pk, 'author': user.username,
+                  'text': 'Да', 'score': 5}]
+        assert client.post(
+            URL_BULK, data=items, content_type='application/json'
+        ).status_code == 401
+        assert user_client.post(
+            URL_BULK, data=items, format='json'
+        ).status_code == 403, (
+            f'Проверьте, что `{URL_BULK}` недоступен обычному пользователю.'
+        )
+        assert not Review.objects.exists()
+
+    def test_04_broken_stream_rolls_back(self, admin_client, titles, user):
+        body = ndjson([{'title': titles[0].pk, 'author': user.username,
+                        'text': 'Да', 'score': 5}]) + '\n{"title": '
+        response = admin_client.post(
+            URL_BULK, data=body, content_type='application/x-ndjson'
+        )
+        assert response.status_code == 400
+        assert not Review.objects.exists()
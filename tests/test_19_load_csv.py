@@ -0,0 +1,133 @@
+import csv
+import shutil
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, F, Sum
+
+from api.cache import get_version
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'api_yamdb/static/data'
+
+
+def count_rows(path, filename):
+    with open(path / filename, encoding='utf-8') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+def load_csv(path, *args):
+    call_command('load_csv', '--path', str(path), *args, stdout=StringIO())
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / 'data'
+    shutil.copytree(DATA_DIR, path)
+    return path
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19LoadCSV:
+
+    def check_loaded(self, path):
+        for model, filename in (
+            (Category, 'category.csv'),
+            (Genre, 'genre.csv'),
+            (User, 'users.csv'),
+            (Title, 'titles.csv'),
+            (Title.genre.through, 'genre_title.csv'),
+            (Review, 'review.csv'),
+            (Comment, 'comments.csv'),
+        ):
+            assert model.objects.count() == count_rows(path, filename), (
+                f'Проверьте, что команда `load_csv` загружает все строки '
+                f'файла `{filename}`.'
+            )
+        self.check_ratings()
+
+    @staticmethod
+    def check_ratings():
+        expected = {
+            title['pk']: (title['total'] or 0, title['review_count'])
+            for title in Title.objects.annotate(
+                total=Sum('reviews__score'), review_count=Count('reviews')
+            ).values('pk', 'total', 'review_count')
+        }
+        actual = {
+            pk: (rating_sum, rating_count)
+            for pk, rating_sum, rating_count in Title.objects.values_list(
+                'pk', 'rating_sum', 'rating_count'
+            )
+        }
+        assert actual == expected, (
+            'Проверьте, что после загрузки отзывов команда `load_csv` '
+            'пересчитывает рейтинги произведений.'
+        )
+
+    def test_01_serial(self, data_dir):
+        load_csv(data_dir)
+        self.check_loaded(data_dir)
+
+    def test_02_workers(self, data_dir):
+        load_csv(data_dir, '--workers', '4', '--chunk-size', '10')
+        self.check_loaded(data_dir)
+
+    def test_03_conflicts_update(self, data_dir):
+        load_csv(data_dir)
+        with open(data_dir / 'review.csv', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            fieldnames = reader.fieldnames
+            rows = list(reader)
+        for row in rows:
+            row['score'] = '1'
+        with open(data_dir / 'review.csv', 'w', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+        load_csv(data_dir, '--conflicts', 'update')
+
+        self.check_loaded(data_dir)
+        assert set(
+            Review.objects.values_list('score', flat=True)
+        ) == {1}, (
+            'Проверьте, что в режиме `--conflicts update` команда '
+            '`load_csv` обновляет существующие отзывы.'
+        )
+        assert not Title.objects.exclude(
+            rating_sum=F('rating_count')
+        ).exists(), (
+            'Проверьте, что после обновления отзывов рейтинги '
+            'произведений пересчитываются.'
+        )
+
+    def test_04_missing_links_reported(self, data_dir):
+        path = data_dir / 'genre_title.csv'
+        path.write_text(
+            path.read_text(encoding='utf-8').rstrip('\n')
+            + '\n1000,999,1\n1001,1,998\n1002,997,1\n',
+            encoding='utf-8'
+        )
+        out = StringIO()
+        call_command('load_csv', '--path', str(data_dir), stdout=out)
+        output = out.getvalue()
+        assert 'Не найдены произведения с id: 997, 999' in output, (
+            'Проверьте, что `load_csv` перечисляет id произведений, '
+            'которых нет в titles.csv.'
+        )
+        assert 'Не найдены жанры с id: 998' in output
+        assert Title.genre.through.objects.count() == count_rows(
+            data_dir, 'genre_title.csv'
+        ) - 3
+
+    def test_05_load_bumps_versions(self, data_dir):
+        versions = {name: get_version(name) for name in ('category', 'genre')}
+        load_csv(data_dir)
+        for name, version in versions.items():
+            assert get_version(name) != version, (
+                'Проверьте, что `load_csv` сбрасывает кэш и реестр '
+                'категорий и жанров: bulk_create не отправляет сигналы.'
+            )
@@ -0,0 +1,86 @@
+import csv
+from datetime import datetime
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.cache import get_version
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+OPTIONS = (
+    '--seed', '7', '--categories', '3', '--genres', '5', '--users', '30',
+    '--titles', '40', '--max-reviews', '10', '--comments', '1',
+)
+
+
+def read_rows(path, filename):
+    with open(path / filename, encoding='utf-8') as file:
+        return list(csv.DictReader(file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20GenerateData:
+
+    def test_01_csv_round_trip(self, tmp_path):
+        call_command(
+            'generate_data', *OPTIONS, '--output', str(tmp_path),
+            stdout=StringIO()
+        )
+        assert not Title.objects.exists(), (
+            'Проверьте, что с `--output` команда `generate_data` не пишет '
+            'в базу данных.'
+        )
+        call_command('load_csv', '--path', str(tmp_path), stdout=StringIO())
+
+        for model, filename in (
+            (Category, 'category.csv'),
+            (Genre, 'genre.csv'),
+            (User, 'users.csv'),
+            (Title, 'titles.csv'),
+            (Title.genre.through, 'genre_title.csv'),
+            (Review, 'review.csv'),
+            (Comment, 'comments.csv'),
+        ):
+            assert model.objects.count() == len(
+                read_rows(tmp_path, filename)
+            ), (
+                f'Проверьте, что файл `{filename}` от `generate_data` '
+                f'целиком загружается командой `load_csv`.'
+            )
+        reviewed = {row['title_id'] for row in read_rows(
+            tmp_path, 'review.csv'
+        )}
+        assert len(reviewed) > 1, (
+            'Проверьте, что отзывы распределяются по многим произведениям.'
+        )
+
+    def test_02_db_keeps_dates(self, tmp_path):
+        call_command(
+            'generate_data', *OPTIONS, '--output', str(tmp_path),
+            stdout=StringIO()
+        )
+        call_command('generate_data', *OPTIONS, stdout=StringIO())
+
+        for model, filename in (
+            (Review, 'review.csv'), (Comment, 'comments.csv')
+        ):
+            expected = {
+                int(row['id']): datetime.fromisoformat(row['pub_date'])
+                for row in read_rows(tmp_path, filename)
+            }
+            assert dict(
+                model.objects.values_list('id', 'pub_date')
+            ) == expected, (
+                'Проверьте, что `generate_data` сохраняет в базу '
+                'сгенерированные даты публикации.'
+            )
+
+    def test_03_db_load_bumps_versions(self):
+        versions = {name: get_version(name) for name in ('category', 'genre')}
+        call_command('generate_data', *OPTIONS, stdout=StringIO())
+        for name, version in versions.items():
+            assert get_version(name) != version, (
+                'Проверьте, что `generate_data` сбрасывает кэш и реестр '
+                'категорий и жанров: bulk_create не отправляет сигналы.'
+            )
@@ -0,0 +1,79 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Avg
+
+from reviews.models import Review, Title
+from tests.utils import create_single_review, create_titles
+
+URL_TITLE = '/api/v1/titles/{title_id}/'
+URL_REVIEW = '/api/v1/titles/{title_id}/reviews/{review_id}/'
+
+
+def expected_rating(title_id):
+    average = Title.objects.filter(pk=title_id).aggregate(
+        average=Avg('reviews__score')
+    )['average']
+    return None if average is None else int(average)
+
+
+def assert_rating(client, title_id, message):
+    rating = client.get(URL_TITLE.format(title_id=title_id)).json()['rating']
+    assert rating == expected_rating(title_id), message
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Ratings:
+
+    def test_01_rating_follows_reviews(self, client, admin_client,
+                                       user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert_rating(
+            client, title_id,
+            'Проверьте, что у произведения без отзывов рейтинг пустой.'
+        )
+
+        review = create_single_review(
+            user_client, title_id, 'Отзыв', 9
+        ).json()
+        create_single_review(moderator_client, title_id, 'Отзыв', 4)
+        assert_rating(
+            client, title_id,
+            'Проверьте, что рейтинг учитывает новые отзывы.'
+        )
+
+        url = URL_REVIEW.format(title_id=title_id, review_id=review['id'])
+        assert user_client.patch(url, data={'score': 2}).status_code == 200
+        assert_rating(
+            client, title_id,
+            'Проверьте, что рейтинг меняется при изменении оценки отзыва.'
+        )
+
+        assert user_client.delete(url).status_code == 204
+        assert_rating(
+            client, title_id,
+            'Проверьте, что рейтинг пересчитывается при удалении отзыва.'
+        )
+
+    def test_02_rebuild_ratings_command(self, admin_client, user,
+                                        moderator):
+        titles, _, _ = create_titles(admin_client)
+        for title_id, author, score in (
+            (titles[0]['id'], user, 10),
+            (titles[0]['id'], moderator, 3),
+            (titles[1]['id'], user, 7),
+        ):
+            Review.objects.create(
+                title_id=title_id, author=author, text='Отзыв', score=score
+            )
+        Title.objects.update(rating_sum=0, rating_count=0)
+
+        call_command('rebuild_ratings', stdout=StringIO())
+
+        for title in Title.objects.all():
+            assert title.rating == expected_rating(title.pk), (
+                'Проверьте, что команда `rebuild_ratings` пересчитывает '
+                'рейтинги по таблице отзывов.'
+            )